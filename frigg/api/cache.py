@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+
+from frigg.builds.models import Build, Project
+
+
+def anonymous_cache_key(request, project_id):
+    """
+    Returns the cache key for the response to an anonymous GET request, or None if the
+    response should not be cached. The key contains the cache version of the project, which
+    is bumped when its builds start or report, so cached responses never go stale.
+    """
+    if request.method != 'GET' or 'HTTP_AUTHORIZATION' in request.META:
+        return None
+    if request.user.is_authenticated():
+        return None
+
+    return 'api:response:{0}:{1}:{2}'.format(
+        project_id or 'all',
+        Project.get_cache_version(project_id),
+        hashlib.md5(request.get_full_path().encode('utf-8')).hexdigest()
+    )
+
+
+def cached_response(key, view, request, *args, **kwargs):
+    if key is None:
+        return view(request, *args, **kwargs)
+
+    response = cache.get(key)
+    if response is None:
+        response = view(request, *args, **kwargs)
+        if response.status_code == 200:
+            def store(response):
+                cache.set(key, response, settings.FRIGG_API_CACHE_TIMEOUT)
+
+            if getattr(response, 'is_rendered', True):
+                store(response)
+            else:
+                response.add_post_render_callback(store)
+    return response
+
+
+def get_project_id(owner=None, name=None, pk=None, **kwargs):
+    """
+    Returns the id of the project a request is about, or None for listings over several
+    projects.
+    """
+    if owner and name:
+        return Project.objects.filter(owner=owner, name=name).values_list('pk', flat=True).first()
+    if pk and str(pk).isdigit():
+        return Build.objects.filter(pk=pk).values_list('project_id', flat=True).first()
+
+
+def cache_anonymous_response(view):
+    """
+    Caches the responses of anonymous GET requests to a view function until the builds of
+    the project in the request change.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        key = anonymous_cache_key(request, get_project_id(**kwargs))
+        return cached_response(key, view, request, *args, **kwargs)
+    return wrapper
+
+
+class AnonymousResponseCacheMixin(object):
+    """
+    Caches the responses of anonymous GET requests to a viewset, see
+    ``cache_anonymous_response``. The key uses the user from the authenticators of the
+    viewset, not only the session.
+    """
+
+    def get_cache_project_id(self, **kwargs):
+        if not hasattr(self, '_cache_project_id'):
+            self._cache_project_id = get_project_id(**kwargs)
+        return self._cache_project_id
+
+    def dispatch(self, request, *args, **kwargs):
+        key = None
+        if request.method == 'GET':
+            drf_request = self.initialize_request(request, *args, **kwargs)
+            key = anonymous_cache_key(drf_request, self.get_cache_project_id(**kwargs))
+        return cached_response(key, super().dispatch, request, *args, **kwargs)
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+import time
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from django.conf import settings
+from django.db import connection
+from rest_framework.exceptions import ValidationError
+
+from frigg.builds.models import Build, BuildResult, Project
+from frigg.builds.serializers import serialize_build_summaries
+from frigg.deployments.models import PRDeployment
+
+# Models with a change id and the field that points to their build.
+CHANGE_SOURCES = (
+    (Build, 'id'),
+    (BuildResult, 'build_id'),
+    (PRDeployment, 'build_id'),
+)
+
+
+def encode_cursor(change_id):
+    return urlsafe_b64encode('c={0}'.format(change_id).encode('ascii')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    try:
+        prefix, change_id = urlsafe_b64decode(cursor.encode('ascii')).decode('ascii').split('=')
+        if prefix != 'c':
+            raise ValueError(prefix)
+        return int(change_id)
+    except (TypeError, ValueError, UnicodeError):
+        raise ValidationError({'cursor': 'Invalid cursor.'})
+
+
+def get_settled_change_id():
+    """
+    Returns the id of the oldest running transaction. Every change with a lower change id
+    is committed, or rolled back, so they can be returned without skipping any changes.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT txid_snapshot_xmin(txid_current_snapshot())')
+        return cursor.fetchone()[0]
+
+
+def get_changed_build_ids(since, until, limit):
+    """
+    Returns the ids of builds that were changed, or had their result or deployment changed,
+    by transactions from ``since`` up to ``until``, and the change id to continue from.
+    At most ``limit`` changes are returned unless a single transaction changed more, the
+    changes of a transaction are never split between pages.
+    """
+    changes = []
+    for model, field in CHANGE_SOURCES:
+        changes += model.objects.filter(change_id__gte=since, change_id__lt=until) \
+                                .order_by('change_id') \
+                                .values_list('change_id', field)[:limit + 1]
+    changes.sort()
+
+    if len(changes) > limit:
+        until = changes[limit][0]
+        if until == changes[0][0]:
+            until += 1
+            changes = []
+            for model, field in CHANGE_SOURCES:
+                changes += model.objects.filter(change_id=until - 1) \
+                                        .values_list('change_id', field)
+
+    return {build_id for change_id, build_id in changes if change_id < until}, until
+
+
+def get_changes(user, since, timeout):
+    """
+    Returns the builds changed since the given change id and the cursor to continue from.
+    If there are no changes it waits up to ``timeout`` seconds for new changes. Waiting
+    only checks the cache version of all projects, which is bumped when builds start or
+    report, the database is only queried again after the version has changed.
+    """
+    deadline = time.time() + timeout
+    version = None
+
+    while True:
+        current_version = Project.get_cache_version()
+        if current_version != version:
+            build_ids, until = get_changed_build_ids(
+                since,
+                get_settled_change_id(),
+                settings.FRIGG_CHANGES_LIMIT
+            )
+            if build_ids or time.time() >= deadline:
+                break
+            # The changes behind a new version might not be committed yet, so the version
+            # is only stored once nothing has changed.
+            if version is None:
+                version = current_version
+
+        if time.time() >= deadline:
+            break
+        time.sleep(max(0, min(settings.FRIGG_CHANGES_POLL_INTERVAL, deadline - time.time())))
+
+    builds = Build.objects.permitted(user).summary_values().filter(pk__in=build_ids) \
+                                          .order_by('id')
+    return {
+        'cursor': encode_cursor(until),
+        'builds': serialize_build_summaries(builds),
+    }
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+import calendar
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from frigg.builds.models import Build, Project
+from frigg.deployments.models import PRDeployment
+
+
+def _etag(*parts):
+    return hashlib.md5(':'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+
+
+def build_validators(user, **lookup):
+    """
+    Returns the validators of a single build from the timestamps of the build and its
+    result, and the state of its deployment, in one query on primary keys. The change id of
+    the deployment changes with every update, and whether it is alive changes with time, so
+    builds with a deployment only get an etag.
+    """
+    row = Build.objects.permitted(user).filter(**lookup).values_list(
+        'pk', 'updated_at', 'result__id', 'result__updated_at', 'deployment__id',
+        'deployment__change_id', 'deployment__succeeded', 'deployment__start_time',
+        'project__owner'
+    ).first()
+    if row is None:
+        return None, None
+
+    pk, updated_at, result_id, result_updated_at, deployment_id = row[:5]
+    if deployment_id is not None:
+        is_alive = PRDeployment.get_is_alive(row[7], row[6], row[8])
+        return _etag(pk, updated_at, result_id, result_updated_at, deployment_id, row[5],
+                     is_alive), None
+
+    last_modified = max(timestamp for timestamp in (updated_at, result_updated_at)
+                        if timestamp is not None)
+    return _etag(pk, updated_at, result_id, result_updated_at), last_modified
+
+
+def project_validators(user, pk):
+    """
+    Returns the validators of a project. The builds nested in the project are covered by
+    the cache version of the project.
+    """
+    updated_at = Project.objects.permitted(user).filter(pk=pk) \
+                                .values_list('updated_at', flat=True).first()
+    if updated_at is None:
+        return None, None
+    return _etag(pk, updated_at, Project.get_cache_version(pk)), None
+
+
+def get_membership_fingerprint(user):
+    """
+    Returns the number of memberships of the user and the id of the newest one, which
+    changes whenever a membership is added or removed.
+    """
+    if not user.is_authenticated():
+        return None
+    memberships = Project.members.through.objects.filter(user_id=user.pk)
+    return tuple(sorted(memberships.aggregate(count=Count('id'), last=Max('id')).items()))
+
+
+def listing_validators(request, project_id=None):
+    """
+    Returns the validators of a listing from the cache version of the project, or of all
+    projects for listings over several projects, and the memberships of the user, which
+    decide the projects in the listing.
+    """
+    return _etag(
+        request.get_full_path(),
+        request.user.pk,
+        get_membership_fingerprint(request.user),
+        Project.get_cache_version(project_id)
+    ), None
+
+
+class ConditionalGetMixin(object):
+    """
+    Answers GET requests with If-None-Match or If-Modified-Since headers matching the
+    validators from ``get_validators`` with 304 without running the view.
+    """
+
+    def get_validators(self, request, **kwargs):
+        """
+        Returns a tuple of an etag and a last modified datetime, either can be None.
+        """
+        return None, None
+
+    def dispatch(self, request, *args, **kwargs):
+        etag = timestamp = None
+        if request.method == 'GET':
+            drf_request = self.initialize_request(request, *args, **kwargs)
+            etag, last_modified = self.get_validators(drf_request, **kwargs)
+            if last_modified is not None:
+                timestamp = calendar.timegm(last_modified.utctimetuple())
+
+            if etag or timestamp:
+                response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+                if response is not None:
+                    return response
+
+        response = super().dispatch(request, *args, **kwargs)
+        if response.status_code == 200:
+            if etag:
+                response['ETag'] = quote_etag(etag)
+            if timestamp:
+                response['Last-Modified'] = http_date(timestamp)
+        return response
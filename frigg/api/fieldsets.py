@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+from django.utils.functional import cached_property
+
+
+def _split(value):
+    return {field.strip() for field in value.split(',') if field.strip()}
+
+
+class SparseFieldsetsMixin(object):
+    """
+    Lets clients pick the fields of the responses with ``?fields=id,color``. Nested objects
+    can be requested in ``fields`` or in ``?expand=project,result``. All fields are
+    returned when ``fields`` is not given.
+    """
+
+    @cached_property
+    def sparse_fields(self):
+        """
+        Returns the requested fields, or None if all fields should be returned.
+        """
+        params = self.request.query_params
+        if 'fields' not in params:
+            return None
+        return _split(params['fields']) | _split(params.get('expand', ''))
+
+    def requires(self, *fields):
+        """
+        Returns True if any of the given fields are requested. Views use this to skip the
+        joins and lookups behind fields that are left out.
+        """
+        return self.sparse_fields is None or bool(self.sparse_fields.intersection(fields))
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        if self.sparse_fields is not None:
+            fields = getattr(serializer, 'child', serializer).fields
+            for name in set(fields) - self.sparse_fields:
+                fields.pop(name)
+        return serializer
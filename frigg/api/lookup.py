@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+
+from frigg.builds.models import Build
+from frigg.builds.serializers import BuildSummarySerializer
+
+# Build ids are stored in an integer column, larger ids fail in the query.
+MAX_ID = 2 ** 31 - 1
+
+
+def commit_key(owner, name, sha):
+    return '{0}/{1}/{2}'.format(owner, name, sha)
+
+
+def parse_lookup(data):
+    """
+    Validates a lookup request and returns the build ids and the (owner, name, sha) triples
+    in it. ``ids`` is a list of build ids and ``commits`` a list of objects with owner, name
+    and sha, together they can contain at most ``FRIGG_API_LOOKUP_LIMIT`` items.
+    """
+    if not isinstance(data, dict):
+        raise ValidationError('Must be an object with ids and commits.')
+
+    ids = data.get('ids') or []
+    commits = data.get('commits') or []
+    if not isinstance(ids, list) or not isinstance(commits, list):
+        raise ValidationError('ids and commits must be lists.')
+
+    if len(ids) + len(commits) > settings.FRIGG_API_LOOKUP_LIMIT:
+        raise ValidationError('At most {0} builds can be looked up at once.'.format(
+            settings.FRIGG_API_LOOKUP_LIMIT
+        ))
+
+    try:
+        ids = [int(pk) for pk in ids]
+    except (TypeError, ValueError):
+        raise ValidationError({'ids': 'Must be a list of integers.'})
+    if any(not 0 < pk <= MAX_ID for pk in ids):
+        raise ValidationError({'ids': 'Must be between 1 and {0}.'.format(MAX_ID)})
+
+    try:
+        commits = [(str(commit['owner']), str(commit['name']), str(commit['sha']))
+                   for commit in commits]
+    except (TypeError, KeyError):
+        raise ValidationError({'commits': 'Must be a list of objects with owner, name and sha.'})
+
+    return ids, commits
+
+
+def lookup_builds(user, ids, commits):
+    """
+    Returns the permitted builds with the given ids and the newest permitted build of each
+    commit, keyed by the input. Everything is fetched in a single query, builds that do not
+    exist or are not visible to the user are returned as ``None``.
+    """
+    response = {
+        'ids': {str(pk): None for pk in ids},
+        'commits': {commit_key(*commit): None for commit in commits},
+    }
+
+    queries = [Q(pk__in=ids)] if ids else []
+    queries += [Q(project__owner=owner, project__name=name, sha=sha)
+                for owner, name, sha in set(commits)]
+    if not queries:
+        return response
+
+    builds = Build.objects.permitted(user).with_result_summary().filter(reduce(or_, queries))
+    builds = list(builds.order_by('id'))
+
+    for build, data in zip(builds, BuildSummarySerializer(builds, many=True).data):
+        if str(build.pk) in response['ids']:
+            response['ids'][str(build.pk)] = data
+        key = commit_key(build.project.owner, build.project.name, build.sha)
+        if key in response['commits']:
+            response['commits'][key] = data
+
+    return response
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+from django.conf import settings
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class ProjectPagination(PageNumberPagination):
+    page_size = settings.FRIGG_API_PROJECTS_PAGE_SIZE
+
+
+class BuildCursorPagination(CursorPagination):
+    """
+    Pages builds by id instead of by offset, which keeps deep pages as cheap as the first
+    one. The ``next`` link pages to older builds and ``previous`` to newer builds.
+    """
+    page_size = settings.FRIGG_API_BUILDS_PAGE_SIZE
+    ordering = '-id'
+
+    def _get_position_from_instance(self, instance, ordering):
+        # The fast build listings paginate dictionaries from ``values()``.
+        if isinstance(instance, dict):
+            return str(instance[ordering[0].lstrip('-')])
+        return super()._get_position_from_instance(instance, ordering)
@@ -13,6 +13,11 @@ urlpatterns = [
         views.BuildViewSet.as_view({'get': 'retrieve'}),
         name='builds_by_owner'
     ),
+    url(
+        r'^builds/(?P<pk>\d+)/log/$',
+        views.BuildViewSet.as_view({'get': 'get_log'}),
+        name='build_log'
+    ),
     url(
         r'^builds/(?P<owner>[^/]+)/(?P<name>[^/]+)/(?P<build_number>\d+)/$',
         views.BuildViewSet.as_view({'get': 'get_by_owner_name_build_number'}),
@@ -43,6 +48,16 @@ urlpatterns = [
         views.partial_build_page,
         name='partial_build_page'
     ),
+    url(
+        r'^lookup/builds/$',
+        views.BuildLookupView.as_view(),
+        name='build_lookup'
+    ),
+    url(
+        r'^changes/$',
+        views.ChangesView.as_view(),
+        name='changes'
+    ),
     url(
         r'^users/me/',
         views.UserDetailView.as_view(),
@@ -1,65 +1,214 @@
 import json
+from collections import defaultdict
 
+from django.conf import settings
 from django.http import Http404, JsonResponse
 from django.shortcuts import get_object_or_404, render
 from django.views.decorators.csrf import csrf_exempt
-from rest_framework import permissions, viewsets
+from rest_framework import permissions, serializers, viewsets
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from frigg.api.cache import AnonymousResponseCacheMixin, cache_anonymous_response
+from frigg.api.changes import decode_cursor, encode_cursor, get_changes, get_settled_change_id
+from frigg.api.conditional import (ConditionalGetMixin, build_validators, listing_validators,
+                                   project_validators)
+from frigg.api.fieldsets import SparseFieldsetsMixin
+from frigg.api.lookup import lookup_builds, parse_lookup
+from frigg.api.pagination import BuildCursorPagination, ProjectPagination
 from frigg.api.permissions import ReadOnly
 from frigg.authentication.serializers import UserSerializer
 from frigg.builds.filters import BuildPermissionFilter
-from frigg.builds.models import Build, Project
-from frigg.builds.serializers import BuildSerializer
+from frigg.builds.models import Build, BuildResult, Project
+from frigg.builds.serializers import (BuildSerializer, BuildSummarySerializer, get_summary_columns,
+                                      serialize_build_summaries)
 from frigg.deployments.models import PRDeployment
 from frigg.projects.filters import ProjectPermissionFilter
 from frigg.projects.serializers import ProjectSerializer
 
+LOG_COLUMNS = {
+    'tasks': 'result_log',
+    'setup_tasks': 'setup_log',
+    'service_tasks': 'service_log',
+    'after_tasks': 'after_log',
+}
 
-class ProjectViewSet(viewsets.ModelViewSet):
+
+class ProjectViewSet(ConditionalGetMixin, AnonymousResponseCacheMixin, SparseFieldsetsMixin,
+                     viewsets.ModelViewSet):
     queryset = Project.objects.all()
     serializer_class = ProjectSerializer
     filter_backends = [ProjectPermissionFilter]
     permission_classes = ReadOnly, permissions.DjangoModelPermissionsOrAnonReadOnly
+    pagination_class = ProjectPagination
+
+    def get_cache_project_id(self, pk=None, **kwargs):
+        return pk
+
+    def get_validators(self, request, pk=None, **kwargs):
+        if pk is None:
+            return listing_validators(request)
+        if str(pk).isdigit():
+            return project_validators(request.user, pk)
+        return None, None
 
+    def list(self, request, *args, **kwargs):
+        projects = self.paginate_queryset(self.filter_queryset(self.get_queryset()))
+        if self.requires('builds'):
+            self.prefetch_builds(projects)
+        return self.get_paginated_response(self.get_serializer(projects, many=True).data)
 
-class BuildViewSet(viewsets.ModelViewSet):
+    def retrieve(self, request, *args, **kwargs):
+        project = self.get_object()
+        if self.requires('builds'):
+            self.prefetch_builds([project])
+        return Response(self.get_serializer(project).data)
+
+    def prefetch_builds(self, projects):
+        """
+        Sets ``recent_builds`` on the projects to their last builds, fetched in one query.
+        """
+        builds = defaultdict(list)
+        queryset = Build.objects.with_result_summary().recent_for_projects(
+            [project.pk for project in projects],
+            settings.FRIGG_API_PROJECT_BUILDS
+        )
+        for build in queryset:
+            builds[build.project_id].append(build)
+
+        for project in projects:
+            project.recent_builds = builds[project.pk]
+
+
+class BuildViewSet(ConditionalGetMixin, AnonymousResponseCacheMixin, SparseFieldsetsMixin,
+                   viewsets.ModelViewSet):
     queryset = Build.objects.all()
     serializer_class = BuildSerializer
-    paginate_by = 50
+    pagination_class = BuildCursorPagination
     filter_backends = [BuildPermissionFilter]
     permission_classes = ReadOnly, permissions.DjangoModelPermissionsOrAnonReadOnly
 
-    def get_by_owner(self, request, owner):
-        builds = Build.objects.permitted(request.user).select_related('project', 'result').filter(
-            project__owner=owner
-        )[:100]
+    def get_validators(self, request, pk=None, owner=None, name=None, build_number=None):
+        if pk is not None:
+            if str(pk).isdigit():
+                return build_validators(request.user, pk=pk)
+            return None, None
+        if build_number is not None:
+            return build_validators(request.user, project__owner=owner, project__name=name,
+                                    build_number=build_number)
+        return listing_validators(request, self.get_cache_project_id(owner=owner, name=name))
 
-        if len(builds) == 0:
-            raise Http404
+    def get_related(self):
+        """
+        Returns the relations that are needed by the requested fields.
+        """
+        related = []
+        if self.requires('project', 'pull_request_url', 'commit_url', 'deployment'):
+            related.append('project')
+        if self.requires('result', 'color'):
+            related.append('result')
+        if self.requires('deployment'):
+            related.append('deployment')
+        return related
+
+    def get_queryset(self):
+        if self.action == 'list':
+            return Build.objects.with_result_summary(self.get_related())
+        queryset = super().get_queryset()
+        related = self.get_related()
+        return queryset.select_related(*related) if related else queryset
 
-        return Response(BuildSerializer(builds, many=True).data)
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return BuildSummarySerializer
+        return super().get_serializer_class()
+
+    def get_by_owner(self, request, owner):
+        builds = Build.objects.permitted(request.user).summary_values(
+            get_summary_columns(self.sparse_fields)
+        ).filter(
+            project__owner=owner
+        )
+        return self.paginated_builds(builds)
 
     def get_by_owner_name(self, request, owner, name):
-        builds = Build.objects.permitted(request.user).select_related('project', 'result').filter(
+        builds = Build.objects.permitted(request.user).summary_values(
+            get_summary_columns(self.sparse_fields)
+        ).filter(
             project__owner=owner,
             project__name=name
-        )[:100]
+        )
+        return self.paginated_builds(builds)
+
+    def paginated_builds(self, queryset):
+        builds = self.paginate_queryset(queryset)
 
-        if len(builds) == 0:
+        if len(builds) == 0 and self.paginator.cursor is None:
             raise Http404
 
-        return Response(BuildSerializer(builds, many=True).data)
+        return self.get_paginated_response(serialize_build_summaries(builds, self.sparse_fields))
 
     def get_by_owner_name_build_number(self, request, owner, name, build_number):
         build = get_object_or_404(
-            Build.objects.permitted(request.user).select_related('project', 'result'),
+            self.get_queryset().filter(Build.objects.permitted_query(request.user)),
             project__owner=owner,
             project__name=name,
             build_number=build_number
         )
-        return Response(BuildSerializer(build).data)
+        return Response(self.get_serializer(build).data)
+
+    def get_log(self, request, pk):
+        """
+        Returns the tasks of a build without their output, or a single task with the lines
+        ``start`` to ``end`` of its output when ``task`` is given. ``log`` selects one of
+        tasks, setup_tasks, service_tasks and after_tasks.
+        """
+        log = LOG_COLUMNS.get(request.query_params.get('log', 'tasks'))
+        if log is None:
+            raise serializers.ValidationError({'log': 'Must be one of {0}.'.format(
+                ', '.join(sorted(LOG_COLUMNS))
+            )})
+
+        results = BuildResult.objects.permitted(request.user).filter(build_id=pk)
+
+        if 'task' not in request.query_params:
+            tasks = results.log_index(log).first()
+            if tasks is None:
+                raise Http404
+            if not tasks:
+                tasks = [{key: value for key, value in task.items() if key != 'log'}
+                         for task in self.get_archived_log(results, log)]
+            return Response(tasks)
+
+        try:
+            index = int(request.query_params['task'])
+            start = int(request.query_params.get('start', 0))
+            end = request.query_params.get('end')
+            end = int(end) if end is not None else None
+        except ValueError:
+            raise serializers.ValidationError('task, start and end must be integers.')
+        if index < 0:
+            raise serializers.ValidationError({'task': 'Must not be negative.'})
+
+        task = results.log_task(log, index).first()
+        if task is None:
+            archived = self.get_archived_log(results, log)
+            if not 0 <= index < len(archived):
+                raise Http404
+            task = archived[index]
+
+        lines = (task.pop('log', None) or '').splitlines()
+        task.update({
+            'index': index,
+            'line_count': len(lines),
+            'start': start,
+            'lines': lines[start:end],
+        })
+        return Response(task)
+
+    def get_archived_log(self, results, log):
+        result = results.filter(archived=True).select_related('archive').first()
+        return result.archived_logs.get(log, []) if result else []
 
 
 class UserDetailView(APIView):
@@ -69,6 +218,38 @@ class UserDetailView(APIView):
         return Response(serializer.data)
 
 
+class ChangesView(APIView):
+    """
+    Returns the builds that changed since the cursor, waiting up to ``timeout`` seconds for
+    changes. Requests without a cursor return the cursor to start from.
+    """
+
+    def get(self, request, format=None):
+        if 'cursor' not in request.query_params:
+            return Response({'cursor': encode_cursor(get_settled_change_id()), 'builds': []})
+
+        since = decode_cursor(request.query_params['cursor'])
+        try:
+            timeout = int(request.query_params.get('timeout', 0))
+        except ValueError:
+            raise serializers.ValidationError({'timeout': 'Must be an integer.'})
+        timeout = max(0, min(timeout, settings.FRIGG_CHANGES_MAX_TIMEOUT))
+
+        return Response(get_changes(request.user, since, timeout))
+
+
+class BuildLookupView(APIView):
+    """
+    Looks up many builds in one request. The body contains a list of build ``ids`` and a
+    list of ``commits`` with owner, name and sha, the response contains the build for each
+    of them, or null if it is not found.
+    """
+
+    def post(self, request, format=None):
+        ids, commits = parse_lookup(request.data)
+        return Response(lookup_builds(request.user, ids, commits))
+
+
 @csrf_exempt
 def report_build(request):
     try:
@@ -94,10 +275,11 @@ def report_deployment(request):
     return response
 
 
+@cache_anonymous_response
 def partial_build_page(request, owner, name, build_number):
     return render(request, 'builds/partials/build_result.html', {
         'build': get_object_or_404(
-            Build.objects.select_related('result'),
+            Build.objects.permitted(request.user).select_related('project', 'result'),
             project__owner=owner,
             project__name=name,
             build_number=build_number
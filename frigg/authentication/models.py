@@ -1,4 +1,7 @@
 # -*- coding: utf8 -*-
+import logging
+
+import requests
 from django.contrib.auth.models import AbstractUser
 from django.core.cache import cache
 from django.utils.functional import cached_property
@@ -6,6 +9,8 @@ from social.apps.django_app.default.models import UserSocialAuth
 
 from frigg.helpers import github
 
+logger = logging.getLogger(__name__)
+
 
 class User(AbstractUser):
     @cached_property
@@ -24,5 +29,8 @@ class User(AbstractUser):
 
     def update_repo_permissions(self):
         if self.github_token:
-            github.update_repo_permissions(self)
-            cache.delete('projects:permitted:{}'.format(self.username))
+            try:
+                github.update_repo_permissions(self)
+            except requests.RequestException as error:
+                logger.warning('Could not update repo permissions for {0}'.format(self),
+                               extra={'error': error})
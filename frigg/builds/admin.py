@@ -34,6 +34,7 @@ class BuildInline(admin.TabularInline):
 @admin.register(Build)
 class BuildAdmin(admin.ModelAdmin):
     list_display = ('build_number', 'project', 'branch', 'pull_request_id', 'sha', 'color')
+    list_select_related = ('project', 'result')
     readonly_fields = ('build_number', 'project', 'branch', 'pull_request_id', 'sha', 'color',
                        'message', 'start_time', 'end_time', 'author')
     inlines = [BuildResultInline]
@@ -55,3 +56,4 @@ class BuildAdmin(admin.ModelAdmin):
 @admin.register(BuildResult)
 class BuildResultAdmin(BuildResultMixin, admin.ModelAdmin):
     list_display = ('__str__', 'worker_host', 'succeeded', 'still_running', 'coverage')
+    list_select_related = ('build__project',)
@@ -0,0 +1,52 @@
+# -*- coding: utf8 -*-
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+
+from django.conf import settings
+
+LOG_COLUMNS = ('result_log', 'setup_log', 'service_log', 'after_log')
+
+
+def summarize_tasks(tasks):
+    """
+    Returns the name of the first task, the number of tasks and the names of the failing
+    tasks, which is what listings need from a result log.
+    """
+    tasks = tasks or []
+    return {
+        'first_task': tasks[0].get('task') if tasks else None,
+        'task_count': len(tasks),
+        'failing_tasks': [task.get('task') for task in tasks if task.get('succeeded') is False],
+    }
+
+
+def get_path(digest):
+    return os.path.join(settings.FRIGG_LOG_ARCHIVE_DIRECTORY, digest[:2], digest + '.json.gz')
+
+
+def write_logs(logs):
+    """
+    Writes the logs, a dictionary with ``LOG_COLUMNS``, to the archive and returns the
+    digest of the content and the size of the compressed file. Files are named after the
+    sha256 of their content, so identical logs share a file and a file is never rewritten.
+    """
+    content = json.dumps({column: logs.get(column) or [] for column in LOG_COLUMNS},
+                         sort_keys=True).encode('utf8')
+    digest = hashlib.sha256(content).hexdigest()
+    path = get_path(digest)
+
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), delete=False) as f:
+            f.write(gzip.compress(content))
+        os.replace(f.name, path)
+
+    return digest, os.path.getsize(path)
+
+
+def read_logs(digest):
+    with gzip.open(get_path(digest), 'rt', encoding='utf8') as f:
+        return json.load(f)
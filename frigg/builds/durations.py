@@ -0,0 +1,60 @@
+# -*- coding: utf8 -*-
+DURATION_FIELDS = ('duration_average', 'duration_p50', 'duration_p90', 'duration_histogram')
+
+# Upper bounds in seconds of the histogram buckets, growing by 25% from 10 seconds to about
+# four hours. The last bucket of the histogram holds the longer durations.
+BUCKETS = [int(10 * 1.25 ** index) for index in range(34)]
+
+# Weight of the newest duration in the moving average.
+ALPHA = 0.2
+
+# The histogram is multiplied by this for every new duration, which makes it roll over the
+# last 20 or so builds.
+DECAY = 0.9
+
+
+def get_bucket(seconds):
+    for index, bound in enumerate(BUCKETS):
+        if seconds < bound:
+            return index
+    return len(BUCKETS)
+
+
+def get_percentile(histogram, fraction):
+    """
+    Returns the duration below which the given fraction of the histogram is, interpolated
+    linearly within the bucket.
+    """
+    total = sum(histogram)
+    if not total:
+        return None
+
+    target = total * fraction
+    cumulative = 0
+    for index, count in enumerate(histogram):
+        if count and cumulative + count >= target:
+            lower = BUCKETS[index - 1] if index else 0
+            if index == len(BUCKETS):
+                return float(lower)
+            return round(lower + (BUCKETS[index] - lower) * (target - cumulative) / count, 1)
+        cumulative += count
+    return float(BUCKETS[-1])
+
+
+def add_duration(stats, seconds):
+    """
+    Returns the duration statistics, a dictionary with ``DURATION_FIELDS``, with the given
+    duration in seconds added.
+    """
+    average = stats.get('duration_average')
+    histogram = stats.get('duration_histogram') or [0] * (len(BUCKETS) + 1)
+
+    histogram = [round(count * DECAY, 4) for count in histogram]
+    histogram[get_bucket(seconds)] += 1
+
+    return {
+        'duration_average': seconds if average is None else average + ALPHA * (seconds - average),
+        'duration_p50': get_percentile(histogram, 0.5),
+        'duration_p90': get_percentile(histogram, 0.9),
+        'duration_histogram': histogram,
+    }
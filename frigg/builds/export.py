@@ -0,0 +1,87 @@
+# -*- coding: utf8 -*-
+import csv
+import io
+import json
+
+from frigg.builds.models import Build
+
+EXPORT_COLUMNS = (
+    'build_number', 'branch', 'sha', 'pull_request_id', 'start_time', 'end_time', 'duration',
+    'succeeded', 'coverage', 'worker_host',
+)
+
+EXPORT_FORMATS = ('ndjson', 'csv')
+
+CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+CHUNK_SIZE = 1000
+
+
+def get_export_rows(project, chunk_size=CHUNK_SIZE):
+    """
+    Yields the builds of the project, oldest first, as dictionaries with ``EXPORT_COLUMNS``.
+    The builds are read in chunks of ``chunk_size`` ordered by id, so the memory use does not
+    grow with the size of the history. The logs are never selected.
+    """
+    builds = Build.objects.filter(project=project).order_by('id').values_list(
+        'id', 'build_number', 'branch', 'sha', 'pull_request_id', 'start_time', 'end_time',
+        'result__succeeded', 'result__coverage', 'result__worker_host',
+    )
+
+    last_id = 0
+    while True:
+        chunk = 0
+        for build in builds.filter(id__gt=last_id)[:chunk_size].iterator():
+            last_id, number, branch, sha, pull_request_id, start, end, succeeded, coverage, \
+                worker_host = build
+            chunk += 1
+            yield {
+                'build_number': number,
+                'branch': branch,
+                'sha': sha,
+                'pull_request_id': pull_request_id or None,
+                'start_time': start.isoformat() if start else None,
+                'end_time': end.isoformat() if end else None,
+                'duration': (end - start).total_seconds() if start and end else None,
+                'succeeded': succeeded,
+                'coverage': float(coverage) if coverage is not None else None,
+                'worker_host': worker_host,
+            }
+        if chunk < chunk_size:
+            break
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(row) + '\n'
+
+
+def csv_lines(rows):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, EXPORT_COLUMNS)
+
+    def flush():
+        line = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return line
+
+    writer.writeheader()
+    yield flush()
+    for row in rows:
+        writer.writerow(row)
+        yield flush()
+
+
+def export_builds(project, export_format):
+    """
+    Returns an iterator over the lines of the build history of the project in the given
+    format, either ndjson or csv.
+    """
+    rows = get_export_rows(project)
+    if export_format == 'csv':
+        return csv_lines(rows)
+    return ndjson_lines(rows)
@@ -0,0 +1,49 @@
+# -*- coding: utf8 -*-
+TRUNCATION_MARKER = '\n\n[... {0} of {1} bytes truncated ...]\n\n'
+
+
+def truncate_log(log, limit):
+    """
+    Returns the first and last ``limit / 2`` bytes of the log with a marker between them
+    that tells how much of the log was removed.
+    """
+    data = log.encode('utf8')
+    if len(data) <= limit:
+        return log
+    head = data[:limit // 2].decode('utf8', 'ignore')
+    tail = data[len(data) - (limit - limit // 2):].decode('utf8', 'ignore')
+    return head + TRUNCATION_MARKER.format(len(data) - limit, len(data)) + tail
+
+
+def get_task_limits(sizes, task_limit, build_limit):
+    """
+    Returns the number of bytes to keep of each task. No task keeps more than
+    ``task_limit`` and the tasks together keep at most ``build_limit``, which is shared
+    equally between the tasks that need it while smaller tasks are kept whole.
+    """
+    limits = [min(size, task_limit) for size in sizes]
+    remaining = build_limit
+    order = sorted(range(len(limits)), key=lambda index: limits[index])
+    for position, index in enumerate(order):
+        limits[index] = min(limits[index], remaining // (len(order) - position))
+        remaining -= limits[index]
+    return limits
+
+
+def limit_logs(logs, task_limit, build_limit):
+    """
+    Truncates the output of the tasks in the given logs, lists of tasks as reported by the
+    worker, to the limits in bytes. Truncated tasks get ``truncated`` set and the original
+    size in ``log_size``. Returns the number of truncated tasks.
+    """
+    tasks = [task for log in logs for task in log if task.get('log')]
+    sizes = [len(task['log'].encode('utf8')) for task in tasks]
+
+    truncated = 0
+    for task, size, limit in zip(tasks, sizes, get_task_limits(sizes, task_limit, build_limit)):
+        if size > limit:
+            task['log'] = truncate_log(task['log'], limit)
+            task['truncated'] = True
+            task['log_size'] = size
+            truncated += 1
+    return truncated
@@ -0,0 +1,69 @@
+# -*- coding: utf8 -*-
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from frigg.builds.models import Build, BuildResult, Project
+from frigg.builds.serializers import BuildSummarySerializer, serialize_build_summaries
+
+TASK_LOG = 'Ran 120 tests in 2.430s\n\nOK\n' * 50
+
+
+class Command(BaseCommand):
+
+    help = 'Compares the serializer and the fast serialization of the build listings. ' \
+           'The builds are created in a transaction that is rolled back afterwards.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--builds', action='store', type=int, nargs='+', dest='builds',
+                            default=[100, 1000], help='Number of builds to serialize.')
+        parser.add_argument('--repeat', action='store', type=int, dest='repeat', default=5,
+                            help='Number of runs, the fastest run is reported.')
+
+    def handle(self, *args, **options):
+        for count in options['builds']:
+            with transaction.atomic():
+                project = self.create_builds(count)
+                builds = Build.objects.filter(project=project)
+
+                serializer = self.measure(options['repeat'], lambda: BuildSummarySerializer(
+                    builds.with_result_summary(), many=True
+                ).data)
+                fast = self.measure(options['repeat'], lambda: serialize_build_summaries(
+                    builds.summary_values()
+                ))
+
+                self.stdout.write(
+                    '{0} builds: serializer {1:.1f} ms, fast {2:.1f} ms ({3:.1f}x)'.format(
+                        count, serializer * 1000, fast * 1000, serializer / fast
+                    )
+                )
+                transaction.set_rollback(True)
+
+    def create_builds(self, count):
+        project = Project.objects.create(owner='frigg', name='benchmark-{0}'.format(uuid.uuid4()),
+                                         approved=True)
+        Build.objects.bulk_create([
+            Build(project=project, build_number=number, sha='a' * 40,
+                  message='Benchmark build {0}\n\nWith a body'.format(number))
+            for number in range(1, count + 1)
+        ])
+        BuildResult.objects.bulk_create([
+            BuildResult(build_id=build_id, succeeded=build_id % 2 == 0, result_log=[
+                {'task': 'flake8', 'succeeded': True, 'return_code': 0, 'log': TASK_LOG},
+                {'task': 'tox', 'succeeded': build_id % 2 == 0, 'return_code': 0,
+                 'log': TASK_LOG},
+            ])
+            for build_id in Build.objects.filter(project=project).values_list('id', flat=True)
+        ])
+        return project
+
+    def measure(self, repeat, function):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            function()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
@@ -1,36 +1,33 @@
 # -*- coding: utf8 -*-
-import logging
 from datetime import timedelta
-from functools import lru_cache
 
 from django.conf import settings
 from django.core.management.base import BaseCommand
 from django.utils.timezone import now
 
-from frigg.builds.models import Build
-
-logger = logging.getLogger(__name__)
-
-
-@lru_cache()
-def get_ids_of_five_last_builds_for_project(project_id):
-    return [build.id for build in Build.objects.filter(project_id=project_id)[:5]]
+from frigg.builds.retention import KEEP_LAST_BUILDS, clear_old_logs
 
 
 class Command(BaseCommand):
-    help = 'Delete logs for builds that are older than {0} hours.'.format(
-        settings.FRIGG_KEEP_BUILD_LOGS_TIMEDELTA
-    )
+    help = 'Move the logs of builds that are older than {0} hours, except the last {1} ' \
+           'builds of every project, to the log archive.'.format(
+               settings.FRIGG_KEEP_BUILD_LOGS_TIMEDELTA, KEEP_LAST_BUILDS
+           )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000,
+                            help='The number of build ids to update in one transaction.')
+        parser.add_argument('--full', action='store_true', default=False,
+                            help='Check every build instead of continuing from the last run.')
 
     def handle(self, *args, **options):
-        delta = timedelta(hours=settings.FRIGG_KEEP_BUILD_LOGS_TIMEDELTA)
+        cutoff = now() - timedelta(hours=settings.FRIGG_KEEP_BUILD_LOGS_TIMEDELTA)
 
-        for build in Build.objects.filter(end_time__lt=now() - delta):
-            five_last_builds = get_ids_of_five_last_builds_for_project(build.project.pk)
-            if build.pk in five_last_builds:
-                continue
+        cleared = reclaimed = 0
+        for count, size in clear_old_logs(cutoff, options['chunk_size'], options['full']):
+            cleared += count
+            reclaimed += size
 
-            try:
-                build.delete_logs()
-            except Exception as error:
-                logger.exception(error)
+        self.stdout.write('Archived logs for {0} builds, reclaimed {1} bytes'.format(
+            cleared, reclaimed
+        ))
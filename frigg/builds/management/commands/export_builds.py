@@ -0,0 +1,29 @@
+# -*- coding: utf8 -*-
+from django.core.management.base import BaseCommand, CommandError
+
+from frigg.builds.export import EXPORT_FORMATS, export_builds
+from frigg.builds.models import Project
+
+
+class Command(BaseCommand):
+    help = 'Exports the build history of a project as ndjson or csv.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('project', help='The project as owner/name.')
+        parser.add_argument('--format', choices=EXPORT_FORMATS, default='ndjson')
+        parser.add_argument('--output', help='The file to write to, defaults to stdout.')
+
+    def handle(self, *args, **options):
+        try:
+            owner, name = options['project'].split('/')
+            project = Project.objects.get(owner=owner, name=name)
+        except (ValueError, Project.DoesNotExist):
+            raise CommandError('Project {0} does not exist'.format(options['project']))
+
+        lines = export_builds(project, options['format'])
+        if options['output']:
+            with open(options['output'], 'w', newline='') as output:
+                output.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending='')
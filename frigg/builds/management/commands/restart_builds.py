@@ -12,7 +12,7 @@ class Command(BaseCommand):
         parser.add_argument('--force', action='store_true', dest='force', default=False)
 
     def handle(self, *args, **options):
-        for build in Build.objects.filter(result=None):
+        for build in Build.objects.filter(end_time=None, result=None):
             if build.has_timed_out():
                 if options['force']:
                     build.start()
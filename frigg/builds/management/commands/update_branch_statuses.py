@@ -0,0 +1,42 @@
+# -*- coding: utf8 -*-
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from frigg.builds.durations import DURATION_FIELDS
+from frigg.builds.models import BranchStatus, Build
+
+
+class Command(BaseCommand):
+
+    help = 'Rebuilds the branch statuses from the last finished build on every branch.'
+
+    def handle(self, *args, **options):
+        builds = Build.objects.filter(pull_request_id=0, project__isnull=False) \
+                              .exclude(result=None) \
+                              .exclude(result__still_running=True) \
+                              .order_by('project_id', 'branch', '-id') \
+                              .distinct('project_id', 'branch') \
+                              .values('id', 'project_id', 'branch', 'end_time',
+                                      'result__succeeded', 'result__coverage')
+
+        with transaction.atomic():
+            durations = {
+                (status[0], status[1]): dict(zip(DURATION_FIELDS, status[2:]))
+                for status in BranchStatus.objects.values_list('project_id', 'branch',
+                                                               *DURATION_FIELDS)
+            }
+            BranchStatus.objects.all().delete()
+            BranchStatus.objects.bulk_create([
+                BranchStatus(
+                    project_id=build['project_id'],
+                    branch=build['branch'],
+                    build_id=build['id'],
+                    succeeded=build['result__succeeded'],
+                    coverage=build['result__coverage'],
+                    end_time=build['end_time'],
+                    **durations.get((build['project_id'], build['branch']), {})
+                )
+                for build in builds.iterator()
+            ], batch_size=1000)
+
+        self.stdout.write('Updated {0} branch statuses'.format(BranchStatus.objects.count()))
@@ -1,27 +1,115 @@
-from django.core.cache import cache
+from django.db import models
 from django.db.models import Q
 
 from frigg.projects.managers import PermittedManager
 
+RECENT_BUILDS_SQL = '''
+    builds_build.id IN (
+        SELECT id FROM (
+            SELECT id, row_number() OVER (PARTITION BY project_id ORDER BY id DESC) AS position
+            FROM builds_build WHERE project_id = ANY(%s)
+        ) AS recent_builds
+        WHERE position <= %s
+    )
+'''
 
-class BuildManager(PermittedManager):
+FAILING_TASKS_SQL = '''
+    CASE WHEN builds_buildresult.archived_summary IS NULL THEN ARRAY(
+        SELECT task ->> 'task' FROM jsonb_array_elements(builds_buildresult.result_log) AS task
+        WHERE task ->> 'succeeded' = 'false'
+    ) ELSE ARRAY(
+        SELECT jsonb_array_elements_text(builds_buildresult.archived_summary -> 'failing_tasks')
+    ) END
+'''
+
+# Archived results have cleared logs, their summary was stored when they were archived.
+RESULT_SUMMARY_SELECT = {
+    'result_first_task': '''coalesce(builds_buildresult.archived_summary ->> 'first_task',
+                                     builds_buildresult.result_log -> 0 ->> 'task')''',
+    'result_task_count': '''coalesce((builds_buildresult.archived_summary ->> 'task_count')::int,
+                                     jsonb_array_length(builds_buildresult.result_log), 0)''',
+    'result_failing_tasks': FAILING_TASKS_SQL,
+}
+
+BUILD_SUMMARY_FIELDS = (
+    'id', 'build_number', 'branch', 'pull_request_id', 'sha', 'start_time', 'end_time',
+    'message', 'author',
+    'project__id', 'project__owner', 'project__name', 'project__private', 'project__approved',
+    'result__id', 'result__coverage', 'result__succeeded', 'result__still_running',
+    'result__worker_host',
+    'deployment__id', 'deployment__image', 'deployment__log', 'deployment__port',
+    'deployment__succeeded', 'deployment__start_time',
+) + tuple(RESULT_SUMMARY_SELECT)
+
+LOG_INDEX_SQL = '''
+    (SELECT coalesce(jsonb_agg(task - 'log'), '[]') FROM jsonb_array_elements({0}) AS task)
+'''
+
+
+class BuildQuerySet(models.QuerySet):
+
+    def with_result_summary(self, related=('project', 'result', 'deployment')):
+        """
+        Selects the given relations of the builds without loading the log columns of the
+        result. The name of the first task, which is needed by ``Build.color``, the number
+        of tasks and the names of the failing tasks are selected from the log in the
+        database.
+        """
+        queryset = self.select_related(*related) if related else self.all()
+        if 'result' in related:
+            queryset = queryset.defer('result__result_log', 'result__setup_log',
+                                      'result__service_log', 'result__after_log') \
+                               .extra(select=RESULT_SUMMARY_SELECT)
+        return queryset
+
+    def summary_values(self, columns=BUILD_SUMMARY_FIELDS):
+        """
+        Returns the builds as dictionaries with the columns needed by
+        ``serialize_build_summaries``, which is much cheaper than creating model instances
+        for read-only listings.
+        """
+        select = {name: sql for name, sql in RESULT_SUMMARY_SELECT.items() if name in columns}
+        return self.extra(select=select).values(*columns)
+
+    def recent_for_projects(self, project_ids, limit):
+        """
+        Returns the last ``limit`` builds of each of the given projects in one query.
+        """
+        return self.extra(where=[RECENT_BUILDS_SQL], params=[list(project_ids), limit])
+
+
+class BuildManager(PermittedManager.from_queryset(BuildQuerySet)):
 
     def permitted_query(self, user):
         query = Q(project__private=False)
         if user.is_authenticated():
-            projects = cache.get('projects:permitted:{}'.format(user.username))
-            if projects is None:
-                from frigg.builds.models import Project  # isort:skip # noqa
-                projects = [p.pk for p in Project.objects.permitted(user)]
-                cache.set('projects:permitted:{}'.format(user.username), projects, 60 * 10)
-            query = Q(project_id__in=projects)
+            from frigg.builds.models import Project  # isort:skip # noqa
+            query |= Q(project_id__in=Project.objects.member_projects(user))
         return query
 
 
-class BuildResultManager(PermittedManager):
+class BuildResultQuerySet(models.QuerySet):
+
+    def log_index(self, log):
+        """
+        Returns the tasks in the given log column without their output.
+        """
+        return self.extra(select={'tasks': LOG_INDEX_SQL.format(log)}) \
+                   .values_list('tasks', flat=True)
+
+    def log_task(self, log, index):
+        """
+        Returns a single task from the given log column, the rest of the log is not loaded.
+        """
+        return self.extra(select={'task': '{0} -> %s'.format(log)}, select_params=[index]) \
+                   .values_list('task', flat=True)
+
+
+class BuildResultManager(PermittedManager.from_queryset(BuildResultQuerySet)):
 
     def permitted_query(self, user):
         query = Q(build__project__private=False)
         if user.is_authenticated():
-            query |= Q(build__project__members=user)
+            from frigg.builds.models import Project  # isort:skip # noqa
+            query |= Q(build__project_id__in=Project.objects.member_projects(user))
         return query
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import basis.models
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_branch_statuses(apps, schema_editor):
+    Build = apps.get_model('builds', 'Build')
+    BranchStatus = apps.get_model('builds', 'BranchStatus')
+
+    builds = Build.objects.filter(pull_request_id=0, project__isnull=False) \
+                          .exclude(result=None) \
+                          .exclude(result__still_running=True) \
+                          .order_by('project_id', 'branch', '-id') \
+                          .distinct('project_id', 'branch') \
+                          .values('id', 'project_id', 'branch', 'end_time',
+                                  'result__succeeded', 'result__coverage')
+
+    BranchStatus.objects.bulk_create([
+        BranchStatus(
+            project_id=build['project_id'],
+            branch=build['branch'],
+            build_id=build['id'],
+            succeeded=build['result__succeeded'],
+            coverage=build['result__coverage'],
+            end_time=build['end_time'],
+        )
+        for build in builds.iterator()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('builds', '0032_buildresult_after_log'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BranchStatus',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False,
+                                        verbose_name='ID')),
+                ('created_at', models.DateTimeField(default=basis.models._now, editable=False)),
+                ('updated_at', models.DateTimeField(default=basis.models._now, editable=False)),
+                ('branch', models.CharField(max_length=100)),
+                ('succeeded', models.BooleanField(default=False)),
+                ('coverage', models.DecimalField(blank=True, decimal_places=2, max_digits=5,
+                                                 null=True)),
+                ('end_time', models.DateTimeField(blank=True, null=True)),
+                ('build', models.ForeignKey(null=True,
+                                            on_delete=django.db.models.deletion.SET_NULL,
+                                            related_name='+', to='builds.Build')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE,
+                                              related_name='branch_statuses',
+                                              to='builds.Project')),
+            ],
+            options={
+                'verbose_name_plural': 'branch statuses',
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='branchstatus',
+            unique_together=set([('project', 'branch')]),
+        ),
+        migrations.RunPython(backfill_branch_statuses, migrations.RunPython.noop),
+    ]
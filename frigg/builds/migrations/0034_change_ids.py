@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+# The change id is the id of the transaction that last changed the row. It is set by a
+# trigger so that updates through querysets are included, and rows changed by transactions
+# older than the oldest running transaction will never get a lower change id.
+CHANGE_ID_FUNCTION_SQL = '''
+    CREATE OR REPLACE FUNCTION frigg_set_change_id() RETURNS trigger AS $$
+    BEGIN
+        NEW.change_id := txid_current();
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql;
+'''
+
+CHANGE_ID_TRIGGER_SQL = '''
+    CREATE TRIGGER {0}_change_id BEFORE INSERT OR UPDATE ON {0}
+    FOR EACH ROW EXECUTE PROCEDURE frigg_set_change_id();
+'''
+
+DROP_CHANGE_ID_TRIGGER_SQL = 'DROP TRIGGER {0}_change_id ON {0};'
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('builds', '0033_branchstatus'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='build',
+            name='change_id',
+            field=models.BigIntegerField(db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='buildresult',
+            name='change_id',
+            field=models.BigIntegerField(db_index=True, editable=False, null=True),
+        ),
+        migrations.RunSQL(
+            CHANGE_ID_FUNCTION_SQL,
+            'DROP FUNCTION frigg_set_change_id();'
+        ),
+        migrations.RunSQL(
+            CHANGE_ID_TRIGGER_SQL.format('builds_build'),
+            DROP_CHANGE_ID_TRIGGER_SQL.format('builds_build')
+        ),
+        migrations.RunSQL(
+            CHANGE_ID_TRIGGER_SQL.format('builds_buildresult'),
+            DROP_CHANGE_ID_TRIGGER_SQL.format('builds_buildresult')
+        ),
+    ]
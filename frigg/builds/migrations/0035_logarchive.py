@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import basis.models
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('builds', '0034_change_ids'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LogArchive',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False,
+                                        verbose_name='ID')),
+                ('created_at', models.DateTimeField(default=basis.models._now, editable=False)),
+                ('updated_at', models.DateTimeField(default=basis.models._now, editable=False)),
+                ('digest', models.CharField(max_length=64)),
+                ('size', models.IntegerField()),
+                ('result', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE,
+                                                related_name='archive',
+                                                to='builds.BuildResult')),
+            ],
+        ),
+    ]
@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('builds', '0035_logarchive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='log_build_limit',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='log_task_limit',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
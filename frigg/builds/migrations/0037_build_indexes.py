@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+INDEXES = {
+    # The last builds of a branch, pull requests are never used for branch statuses.
+    'builds_build_branch_idx': '(project_id, branch, id DESC) WHERE pull_request_id = 0',
+    # The last master build that ended before a build started, for coverage_diff.
+    'builds_build_master_end_time_idx': "(project_id, end_time) WHERE branch = 'master'",
+    # Retention of logs of builds that ended before the retention window.
+    'builds_build_end_time_idx': '(end_time)',
+    # Pending builds, which is a small part of the table.
+    'builds_build_unfinished_idx': '(id) WHERE end_time IS NULL',
+}
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('builds', '0036_project_log_limits'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'CREATE INDEX {0} ON builds_build {1};'.format(name, definition),
+            'DROP INDEX {0};'.format(name),
+        )
+        for name, definition in sorted(INDEXES.items())
+    ]
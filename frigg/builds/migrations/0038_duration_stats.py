@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import django.contrib.postgres.fields.jsonb
+from django.db import migrations, models
+
+from frigg.builds.durations import add_duration
+
+
+def get_stats(builds):
+    stats = {}
+    durations = builds.exclude(start_time=None).exclude(end_time=None) \
+                      .order_by('-id').values_list('start_time', 'end_time')[:20]
+    for start_time, end_time in reversed(list(durations)):
+        stats = add_duration(stats, (end_time - start_time).total_seconds())
+    return stats
+
+
+def backfill_duration_stats(apps, schema_editor):
+    Project = apps.get_model('builds', 'Project')
+    Build = apps.get_model('builds', 'Build')
+    BranchStatus = apps.get_model('builds', 'BranchStatus')
+
+    for project_id in Project.objects.values_list('id', flat=True):
+        stats = get_stats(Build.objects.filter(project_id=project_id))
+        if stats:
+            Project.objects.filter(pk=project_id).update(**stats)
+
+    for status in BranchStatus.objects.values('id', 'project_id', 'branch'):
+        stats = get_stats(Build.objects.filter(project_id=status['project_id'],
+                                               branch=status['branch'], pull_request_id=0))
+        if stats:
+            BranchStatus.objects.filter(pk=status['id']).update(**stats)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('builds', '0037_build_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name=model_name,
+            name=name,
+            field=field,
+        )
+        for model_name in ['branchstatus', 'project']
+        for name, field in [
+            ('duration_average', models.FloatField(blank=True, editable=False, null=True)),
+            ('duration_histogram', django.contrib.postgres.fields.jsonb.JSONField(
+                blank=True, default=[], editable=False)),
+            ('duration_p50', models.FloatField(blank=True, editable=False, null=True)),
+            ('duration_p90', models.FloatField(blank=True, editable=False, null=True)),
+        ]
+    ] + [
+        migrations.RunPython(backfill_duration_stats, migrations.RunPython.noop),
+    ]
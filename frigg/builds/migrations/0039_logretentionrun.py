@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import basis.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('builds', '0038_duration_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LogRetentionRun',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False,
+                                        verbose_name='ID')),
+                ('created_at', models.DateTimeField(default=basis.models._now, editable=False)),
+                ('updated_at', models.DateTimeField(default=basis.models._now, editable=False)),
+                ('cutoff', models.DateTimeField()),
+                ('marker', models.IntegerField(default=0)),
+                ('last_build_id', models.IntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('builds', '0039_logretentionrun'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='buildresult',
+            name='archived',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.RunSQL(
+            'UPDATE builds_buildresult SET archived = true '
+            'WHERE id IN (SELECT result_id FROM builds_logarchive)',
+            migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import django.contrib.postgres.fields.jsonb
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('builds', '0040_buildresult_archived'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='buildresult',
+            name='archived_summary',
+            field=django.contrib.postgres.fields.jsonb.JSONField(blank=True, editable=False,
+                                                                 null=True),
+        ),
+    ]
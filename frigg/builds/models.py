@@ -1,6 +1,7 @@
 # -*- coding: utf8 -*-
 import json
 import logging
+import time
 from datetime import timedelta
 from decimal import Decimal
 
@@ -11,23 +12,55 @@ from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.postgres.fields.jsonb import JSONField
 from django.core.cache import cache
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models.signals import m2m_changed
+from django.dispatch import receiver
 from django.utils.functional import cached_property
 from django.utils.safestring import mark_safe
 from django.utils.timezone import now
+from django_statsd.clients import statsd
 from markdown import markdown
 
 from frigg.deployments.models import PRDeployment
-from frigg.helpers import github
+from frigg.helpers import github, http
 from frigg.helpers.badges import get_badge, get_coverage_badge, get_unknown_badge
 from frigg.projects.managers import ProjectManager
+from frigg.stats import counters
+from frigg.stats.models import DailyBuildStats
 
+from .archive import LOG_COLUMNS, read_logs, summarize_tasks, write_logs
+from .durations import DURATION_FIELDS, add_duration
+from .log_limits import limit_logs
 from .managers import BuildManager, BuildResultManager
 
 logger = logging.getLogger(__name__)
 
 
-class Project(TimeStampModel):
+class DurationStats(models.Model):
+    """
+    Rolling statistics of the durations of finished builds in seconds, which are updated as
+    builds finish. See ``frigg.builds.durations``.
+    """
+    duration_average = models.FloatField(null=True, blank=True, editable=False)
+    duration_p50 = models.FloatField(null=True, blank=True, editable=False)
+    duration_p90 = models.FloatField(null=True, blank=True, editable=False)
+    duration_histogram = JSONField(default=[], blank=True, editable=False)
+
+    class Meta:
+        abstract = True
+
+    @property
+    def average_time(self):
+        if self.duration_average is not None:
+            return timedelta(seconds=int(self.duration_average))
+
+    def record_duration(self, seconds):
+        stats = add_duration({field: getattr(self, field) for field in DURATION_FIELDS}, seconds)
+        for field, value in stats.items():
+            setattr(self, field, value)
+
+
+class Project(DurationStats, TimeStampModel):
     name = models.CharField(max_length=100, db_index=True, blank=True)
     owner = models.CharField(max_length=100, db_index=True, blank=True)
     private = models.BooleanField(default=True, db_index=True)
@@ -37,6 +70,8 @@ class Project(TimeStampModel):
     can_deploy = models.BooleanField(default=False, db_index=True)
     should_clone_with_ssh = models.BooleanField(default=False)
     image = models.CharField(max_length=200, default="", blank=True)
+    log_task_limit = models.PositiveIntegerField(null=True, blank=True)
+    log_build_limit = models.PositiveIntegerField(null=True, blank=True)
 
     objects = ProjectManager()
 
@@ -52,6 +87,40 @@ class Project(TimeStampModel):
         if self.owner in settings.AUTO_APPROVE_OWNERS:
             self.approved = True
         super().save(*args, **kwargs)
+        self.bump_cache_version(self.pk)
+
+    @staticmethod
+    def get_cache_version(project_id=None):
+        """
+        Returns the version of the cached responses for the project, or for listings over all
+        projects if ``project_id`` is None. A missing version is started from the current
+        time so that it never matches responses cached before it was evicted.
+        """
+        key = 'projects:version:{}'.format(project_id or 'all')
+        version = cache.get(key)
+        if version is None:
+            cache.add(key, int(time.time() * 1000), None)
+            version = cache.get(key)
+        return version
+
+    @staticmethod
+    def bump_cache_version(project_id):
+        for key in ['projects:version:{}'.format(project_id), 'projects:version:all']:
+            try:
+                cache.incr(key)
+            except ValueError:
+                pass
+
+    @property
+    def log_limits(self):
+        """
+        Returns the limits in bytes for the output of a single task and of a whole build.
+        """
+        task_limit, build_limit = self.log_task_limit, self.log_build_limit
+        return (
+            task_limit if task_limit is not None else settings.FRIGG_LOG_LIMITS['task'],
+            build_limit if build_limit is not None else settings.FRIGG_LOG_LIMITS['build'],
+        )
 
     @property
     def github_token(self):
@@ -83,14 +152,15 @@ class Project(TimeStampModel):
             return 0
 
     @property
-    def average_time(self):
-        timings = []
-        builds = self.builds.all()[:10]
-        for build in builds:
-            if build.start_time and build.end_time:
-                timings.append((build.end_time - build.start_time).total_seconds())
-        if timings:
-            return timedelta(seconds=int(sum(timings) / len(timings)))
+    def build_timeout(self):
+        """
+        Returns how long a build may run before it is considered to have timed out.
+        """
+        if self.duration_p90:
+            return timedelta(seconds=self.duration_p90 * 2)
+        if self.average_time:
+            return self.average_time * 2
+        return timedelta(minutes=60)
 
     @property
     def number_of_members(self):
@@ -112,22 +182,98 @@ class Project(TimeStampModel):
         build.start()
         return build
 
+    def get_last_result(self, branch='master'):
+        """
+        Returns build id, succeeded and coverage of the last finished build on the branch, or
+        None if there is no such build. Pull request builds are ignored.
+        """
+        return BranchStatus.objects.filter(project=self, branch=branch) \
+                                   .values('build_id', 'succeeded', 'coverage').first()
+
     def get_badge(self, branch='master'):
-        build = self.builds.filter(branch=branch, pull_request_id=0).exclude(result=None).first()
-        if build:
-            return get_badge(build.result.succeeded)
+        result = self.get_last_result(branch)
+        if result:
+            return get_badge(result['succeeded'])
         return get_unknown_badge('build')
 
     def get_coverage_badge(self, branch='master'):
-        build = self.builds.filter(branch=branch, pull_request_id=0).exclude(result=None).first()
-        if build:
-            return get_coverage_badge(build.result.coverage)
+        result = self.get_last_result(branch)
+        if result:
+            return get_coverage_badge(result['coverage'])
         return get_unknown_badge('coverage')
 
     def update_members(self):
-        collaborators = github.list_collaborators(self)
-        users = get_user_model().objects.filter(username__in=collaborators)
-        self.members = users
+        self.sync_members([self])
+
+    @classmethod
+    def add_memberships(cls, pairs):
+        """
+        Adds the (project id, user id) pairs to the members with one insert. If another
+        process added some of them at the same time, the pairs are inserted one at a time
+        and the existing ones are skipped.
+        """
+        membership = cls.members.through
+        rows = [membership(project_id=project_id, user_id=user_id)
+                for project_id, user_id in pairs]
+        if not rows:
+            return
+        try:
+            with transaction.atomic():
+                membership.objects.bulk_create(rows)
+        except IntegrityError:
+            for row in rows:
+                try:
+                    with transaction.atomic():
+                        row.save()
+                except IntegrityError:
+                    pass
+
+    @classmethod
+    def sync_members(cls, projects):
+        """
+        Sets the members of the projects to their collaborators on github. The collaborators
+        of every project are fetched first, then the memberships are changed with one insert
+        and one delete, regardless of the number of projects.
+        """
+        collaborators = {project.pk: set(github.list_collaborators(project))
+                         for project in projects}
+        users = dict(get_user_model().objects.filter(
+            username__in=set().union(*collaborators.values())
+        ).values_list('username', 'pk'))
+        wanted = {(project_id, users[username])
+                  for project_id, usernames in collaborators.items()
+                  for username in usernames if username in users}
+
+        membership = cls.members.through
+        memberships = membership.objects.filter(project_id__in=collaborators)
+        existing = {(project_id, user_id): pk for pk, project_id, user_id
+                    in memberships.values_list('pk', 'project_id', 'user_id')}
+
+        cls.add_memberships(wanted - set(existing))
+        membership.objects.filter(
+            pk__in=[pk for key, pk in existing.items() if key not in wanted]
+        ).delete()
+
+        changed = {user_id for project_id, user_id in wanted ^ set(existing)}
+        usernames = get_user_model().objects.filter(pk__in=changed) \
+                                            .values_list('username', flat=True)
+        cache.delete_many(['projects:permitted:{}'.format(username) for username in usernames])
+
+
+@receiver(m2m_changed, sender=Project.members.through)
+def clear_permitted_projects_cache(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+
+    if reverse:
+        usernames = [instance.username]
+    elif action == 'pre_clear':
+        usernames = instance.members.values_list('username', flat=True)
+    else:
+        usernames = get_user_model().objects.filter(pk__in=pk_set) \
+                                            .values_list('username', flat=True)
+
+    cache.delete_many(['projects:permitted:{}'.format(username) for username in usernames])
 
 
 class Build(TimeStampModel):
@@ -140,6 +286,7 @@ class Build(TimeStampModel):
     end_time = models.DateTimeField(null=True, blank=True)
     author = models.CharField(max_length=150, blank=True)
     message = models.TextField(null=True, blank=True, editable=False)
+    change_id = models.BigIntegerField(null=True, editable=False, db_index=True)
 
     objects = BuildManager()
 
@@ -198,10 +345,28 @@ class Build(TimeStampModel):
             return 'orange'
         if self.result.succeeded:
             return 'green'
-        if len(self.result.tasks) and self.result.tasks[0]['task'] == '':
+        if self.first_task_name == '':
             return 'gray'
         return 'red'
 
+    @property
+    def first_task_name(self):
+        if hasattr(self, 'result_first_task'):
+            return self.result_first_task
+        return self.result.log_summary['first_task']
+
+    @property
+    def task_count(self):
+        if hasattr(self, 'result_task_count'):
+            return self.result_task_count
+        return self.result.log_summary['task_count']
+
+    @property
+    def failing_tasks(self):
+        if hasattr(self, 'result_failing_tasks'):
+            return self.result_failing_tasks
+        return self.result.log_summary['failing_tasks']
+
     @property
     def queue_object(self):
         environment_variables = {}
@@ -233,17 +398,26 @@ class Build(TimeStampModel):
 
     def start(self):
         if hasattr(self, 'result'):
+            if self.end_time and not self.result.still_running:
+                DailyBuildStats.record_finished(self, sign=-1)
             self.result.delete()
 
         if not self.project.approved:
             BuildResult.create_not_approved(self)
+            Project.bump_cache_version(self.project_id)
             return self
 
         github.set_commit_status(self, pending=True)
+        first_start = self.start_time is None
         self.start_time = now()
         self.end_time = None
         self.save()
 
+        if first_start:
+            DailyBuildStats.record_started(self)
+        counters.build_started(self)
+        Project.bump_cache_version(self.project_id)
+
         r = redis.Redis(**settings.REDIS_SETTINGS)
         queue_length = r.lpush(self.project.queue_name, json.dumps(self.queue_object)) or 0
 
@@ -267,32 +441,74 @@ class Build(TimeStampModel):
 
     def has_timed_out(self):
         try:
-            used_time = now() - self.start_time
-            if self.project.average_time:
-                return used_time > timedelta(seconds=self.project.average_time.total_seconds() * 2)
-            else:
-                return used_time > timedelta(minutes=60)
+            return now() - self.start_time > self.project.build_timeout
         except TypeError:
             return True
 
+    def record_duration(self):
+        """
+        Adds the duration of the finished build to the statistics of the project and, unless
+        it is a pull request, of the branch.
+        """
+        if not self.start_time or not self.end_time:
+            return
+        seconds = (self.end_time - self.start_time).total_seconds()
+
+        with transaction.atomic():
+            project = Project.objects.select_for_update().get(pk=self.project_id)
+            project.record_duration(seconds)
+            project.save(update_fields=DURATION_FIELDS)
+
+            if not self.pull_request_id:
+                status = BranchStatus.objects.select_for_update().filter(
+                    project_id=self.project_id,
+                    branch=self.branch
+                ).first()
+                if status:
+                    status.record_duration(seconds)
+                    status.save(update_fields=DURATION_FIELDS)
+
+        for field in DURATION_FIELDS:
+            setattr(self.project, field, getattr(project, field))
+
     def handle_worker_report(self, payload):
         logger.info('Handle worker report: %s' % payload)
+        finished_before = self.end_time is not None
         result = BuildResult.create_from_worker_payload(self, payload)
+        counters.build_reported(self, result)
+        Project.bump_cache_version(self.project_id)
         if not result.still_running:
             github.set_commit_status(self)
             self.end_time = now()
             self.save()
 
+            if not finished_before:
+                DailyBuildStats.record_finished(self)
+
+            if not self.pull_request_id:
+                BranchStatus.update_from_build(self)
+
+            if not finished_before:
+                self.record_duration()
+
+            Project.bump_cache_version(self.project_id)
+
             if self.project.can_deploy and self.pull_request_id:
                 if 'preview' in payload['settings']:
                     self.initiate_deployment(payload['settings']['preview'])
 
             if 'webhooks' in payload:
                 for url in payload['webhooks']:
-                    self.send_webhook(url)
+                    try:
+                        self.send_webhook(url)
+                    except requests.RequestException as error:
+                        logger.warning('Could not send webhook', extra={
+                            'error': error,
+                            'url': url,
+                        })
 
     def send_webhook(self, url):
-        return requests.post(url, data=json.dumps({
+        return http.post(url, data=json.dumps({
             'sha': self.sha,
             'build_url': self.get_absolute_url(),
             'pull_request_id': self.pull_request_id,
@@ -318,9 +534,10 @@ class Build(TimeStampModel):
 
     def delete_logs(self):
         """
-        This will replace all log with the default content
+        This will move the logs to the log archive and replace them with the default content
         """
         result = self.result
+        result.archive_logs()
         result.service_log = []
         result.setup_log = []
         result.result_log = []
@@ -340,6 +557,9 @@ class BuildResult(TimeStampModel):
     worker_host = models.CharField(max_length=250, null=True, blank=True)
     coverage = models.DecimalField(max_digits=5, decimal_places=2, editable=False, null=True,
                                    blank=True)
+    change_id = models.BigIntegerField(null=True, editable=False, db_index=True)
+    archived = models.BooleanField(default=False, editable=False)
+    archived_summary = JSONField(null=True, blank=True, editable=False)
 
     objects = BuildResultManager()
 
@@ -358,19 +578,71 @@ class BuildResult(TimeStampModel):
 
     @property
     def tasks(self):
-        return self.result_log
+        return self.get_log('result_log')
 
     @property
     def setup_tasks(self):
-        return self.setup_log
+        return self.get_log('setup_log')
 
     @property
     def service_tasks(self):
-        return self.service_log
+        return self.get_log('service_log')
 
     @property
     def after_tasks(self):
-        return self.after_log
+        return self.get_log('after_log')
+
+    @property
+    def log_summary(self):
+        """
+        Returns the summary of the result log from ``summarize_tasks``. Archived results use
+        the summary stored when they were archived, so listings never read the archive.
+        """
+        if self.archived_summary is not None:
+            return self.archived_summary
+        return summarize_tasks(self.result_log)
+
+    def get_log(self, column):
+        """
+        Returns the log in the given column, or the archived log if the column has been
+        cleared. The archive is only read for results that have been archived.
+        """
+        log = getattr(self, column)
+        if log or not self.archived:
+            return log
+        return self.archived_logs.get(column, log)
+
+    @cached_property
+    def archived_logs(self):
+        if not self.archived:
+            return {}
+        try:
+            return read_logs(self.archive.digest)
+        except LogArchive.DoesNotExist:
+            return {}
+        except (OSError, EOFError, ValueError) as error:
+            logger.warning('Could not read the archived logs of result {0}'.format(self.pk),
+                           extra={'error': error})
+            return {}
+
+    def archive_logs(self):
+        """
+        Writes the logs to the log archive. Results without logs are not archived, so that
+        archiving cleared logs again does not replace the archive.
+        """
+        logs = {column: getattr(self, column) for column in LOG_COLUMNS}
+        if not any(logs.values()):
+            return None
+        digest, size = write_logs(logs)
+        archive = LogArchive.objects.update_or_create(result=self, defaults={
+            'digest': digest,
+            'size': size,
+        })[0]
+        self.archived = True
+        self.archived_summary = summarize_tasks(self.result_log)
+        BuildResult.objects.filter(pk=self.pk).update(archived=True,
+                                                      archived_summary=self.archived_summary)
+        return archive
 
     @classmethod
     def create_not_approved(cls, build):
@@ -385,7 +657,19 @@ class BuildResult(TimeStampModel):
     @classmethod
     def create_from_worker_payload(cls, build, payload):
         result = cls.objects.get_or_create(build_id=build.pk)[0]
+
+        truncated = limit_logs(
+            [payload.get(key) or [] for key in ('results', 'setup_results', 'service_results',
+                                                'after_results')],
+            *build.project.log_limits
+        )
+        if truncated:
+            statsd.incr('builds.logs.truncated', truncated)
+            logger.info('Truncated {0} task logs of {1}'.format(truncated, build))
+
         result.result_log = payload['results']
+        result.archived = False
+        result.archived_summary = None
 
         if 'setup_results' in payload:
             result.setup_log = payload['setup_results']
@@ -425,3 +709,67 @@ class BuildResult(TimeStampModel):
             if 'succeeded' in r:
                 succeeded = succeeded and r['succeeded']
         return succeeded
+
+
+class LogArchive(TimeStampModel):
+    """
+    The logs of a build result that were moved to the log archive, the file is named after
+    the digest of its content.
+    """
+    result = models.OneToOneField(BuildResult, related_name='archive')
+    digest = models.CharField(max_length=64)
+    size = models.IntegerField()
+
+    def __str__(self):
+        return str(self.result)
+
+
+class LogRetentionRun(TimeStampModel):
+    """
+    The progress of a run of the log retention. Every build below ``marker`` had either
+    ended before ``cutoff`` or never finished, when ``last_build_id`` was the newest build.
+    """
+    cutoff = models.DateTimeField()
+    marker = models.IntegerField(default=0)
+    last_build_id = models.IntegerField(default=0)
+
+    def __str__(self):
+        return 'Log retention up to build {0}'.format(self.marker)
+
+
+class BranchStatus(DurationStats, TimeStampModel):
+    """
+    The status of the last finished build on a branch. Pull request builds are not included.
+    """
+    project = models.ForeignKey(Project, related_name='branch_statuses')
+    branch = models.CharField(max_length=100)
+    build = models.ForeignKey(Build, related_name='+', null=True, on_delete=models.SET_NULL)
+    succeeded = models.BooleanField(default=False)
+    coverage = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    end_time = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ('project', 'branch')
+        verbose_name_plural = 'branch statuses'
+
+    def __str__(self):
+        return '{0} / {1}'.format(self.project, self.branch)
+
+    @classmethod
+    def update_from_build(cls, build):
+        values = {
+            'build': build,
+            'succeeded': build.result.succeeded,
+            'coverage': build.result.coverage,
+            'end_time': build.end_time,
+        }
+        status, created = cls.objects.get_or_create(
+            project_id=build.project_id,
+            branch=build.branch,
+            defaults=values
+        )
+        if not created and (status.build_id is None or status.build_id <= build.pk):
+            for key, value in values.items():
+                setattr(status, key, value)
+            status.save()
+        return status
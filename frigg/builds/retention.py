@@ -0,0 +1,173 @@
+# -*- coding: utf8 -*-
+import logging
+from array import array
+
+from django.db import connection, transaction
+
+from frigg.builds.archive import LOG_COLUMNS, write_logs
+from frigg.builds.models import LogArchive, LogRetentionRun, Project
+
+logger = logging.getLogger(__name__)
+
+KEEP_LAST_BUILDS = 5
+
+# Results fetched at a time while writing logs to the archive. A build can have logs of
+# several megabytes, so the logs of a chunk are streamed with a server side cursor.
+FETCH_SIZE = 20
+
+LAST_BUILDS_SQL = '''
+    SELECT id FROM (
+        SELECT id, row_number() OVER (PARTITION BY project_id ORDER BY id DESC) AS position
+        FROM builds_build
+        WHERE id <= %s
+    ) AS last_builds
+    WHERE position <= %s
+'''
+
+# The results with logs matching ``{where}`` of builds that ended before the cutoff and are
+# not kept, locked until the logs are cleared.
+OLD_LOGS_SQL = '''
+    FROM builds_buildresult
+    JOIN builds_build ON builds_build.id = builds_buildresult.build_id
+    WHERE {{where}}
+      AND builds_build.end_time < %s
+      AND builds_build.id <> ALL(%s)
+      AND ({has_logs})
+    FOR UPDATE OF builds_buildresult
+'''.format(
+    has_logs=' OR '.join("coalesce({0}, '[]') <> '[]'".format(column) for column in LOG_COLUMNS),
+)
+
+SELECT_LOGS_SQL = '''
+    SELECT builds_buildresult.id, {columns} {old_logs}
+'''.format(
+    columns=', '.join(LOG_COLUMNS),
+    old_logs=OLD_LOGS_SQL,
+)
+
+# The summary from ``summarize_tasks``, computed from the result log before it is cleared.
+SUMMARY_SQL = '''jsonb_build_object(
+    'first_task', builds_buildresult.result_log -> 0 ->> 'task',
+    'task_count', coalesce(jsonb_array_length(builds_buildresult.result_log), 0),
+    'failing_tasks', coalesce((
+        SELECT jsonb_agg(task -> 'task')
+        FROM jsonb_array_elements(builds_buildresult.result_log) AS task
+        WHERE task ->> 'succeeded' = 'false'
+    ), '[]')
+)'''
+
+CLEAR_LOGS_SQL = '''
+    WITH cleared AS (
+        UPDATE builds_buildresult
+        SET {clear}, archived = true, archived_summary = {summary}, updated_at = now()
+        FROM (
+            SELECT builds_buildresult.id, builds_build.project_id, {size} AS size {old_logs}
+        ) AS old
+        WHERE builds_buildresult.id = old.id
+        RETURNING old.project_id, old.size
+    )
+    SELECT project_id, count(*), sum(size) FROM cleared GROUP BY project_id
+'''.format(
+    clear=', '.join("{0} = '[]'".format(column) for column in LOG_COLUMNS),
+    summary=SUMMARY_SQL,
+    size=' + '.join('coalesce(pg_column_size({0}), 0)'.format(column) for column in LOG_COLUMNS),
+    old_logs=OLD_LOGS_SQL,
+)
+
+NEXT_MARKER_SQL = '''
+    SELECT coalesce(min(id), %s) FROM builds_build
+    WHERE id >= %s AND (end_time >= %s OR (end_time IS NULL AND created_at >= %s))
+'''
+
+
+def get_last_build_ids(up_to, keep=KEEP_LAST_BUILDS):
+    """
+    Returns the ids of the last ``keep`` builds of every project, counting only the builds
+    with ids up to ``up_to``.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(LAST_BUILDS_SQL, [up_to, keep])
+        return array('L', sorted(row[0] for row in cursor.fetchall()))
+
+
+def clear_logs(where, params, cutoff, keep_ids):
+    """
+    Moves the logs of the results matching ``where`` whose builds ended before ``cutoff``
+    and are not in ``keep_ids`` to the log archive. Only results that still have logs are
+    updated. Returns the number of cleared results and the bytes that were used by their
+    logs in the database.
+    """
+    params = params + [cutoff, list(keep_ids)]
+    with transaction.atomic():
+        archives = []
+        connection.ensure_connection()
+        with connection.connection.cursor('builds_log_retention') as cursor:
+            cursor.execute(SELECT_LOGS_SQL.format(where=where), params)
+            rows = cursor.fetchmany(FETCH_SIZE)
+            while rows:
+                for row in rows:
+                    digest, size = write_logs(dict(zip(LOG_COLUMNS, row[1:])))
+                    archives.append(LogArchive(result_id=row[0], digest=digest, size=size))
+                rows = cursor.fetchmany(FETCH_SIZE)
+
+        LogArchive.objects.filter(result_id__in=[archive.result_id for archive in archives]) \
+                          .delete()
+        LogArchive.objects.bulk_create(archives)
+
+        with connection.cursor() as cursor:
+            cursor.execute(CLEAR_LOGS_SQL.format(where=where), params)
+            rows = cursor.fetchall()
+
+    for project_id, count, size in rows:
+        Project.bump_cache_version(project_id)
+    return sum(row[1] for row in rows), sum(row[2] for row in rows)
+
+
+def clear_old_logs(cutoff, chunk_size=1000, full=False):
+    """
+    Clears the logs of builds that ended before ``cutoff``, except the last
+    ``KEEP_LAST_BUILDS`` builds of every project, in chunks of ``chunk_size`` build ids.
+    Yields the number of cleared results and the reclaimed bytes of every chunk.
+
+    The progress is stored as a ``LogRetentionRun`` and later runs start from its marker.
+    Below the marker only two kinds of builds can still have logs to clear: builds that
+    ended after the cutoff of the previous run, which includes builds that were restarted,
+    and builds that were among the last builds at the previous run. Both are checked again
+    before continuing from the marker. A run without earlier progress, or with ``full``,
+    checks every build.
+    """
+    previous = None if full else LogRetentionRun.objects.order_by('-id').first()
+
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT coalesce(max(id), 0) FROM builds_build')
+        max_id = cursor.fetchone()[0]
+    keep_ids = get_last_build_ids(max_id)
+
+    marker = 0
+    if previous is not None:
+        marker = previous.marker
+        yield clear_logs('builds_build.id < %s AND builds_build.end_time >= %s',
+                         [marker, previous.cutoff], cutoff, keep_ids)
+        replaced = sorted(set(get_last_build_ids(previous.last_build_id)) - set(keep_ids))
+        if replaced:
+            yield clear_logs('builds_build.id = ANY(%s) AND builds_build.id < %s',
+                             [replaced, marker], cutoff, keep_ids)
+
+    with connection.cursor() as cursor:
+        cursor.execute(NEXT_MARKER_SQL, [max_id + 1, marker, cutoff, cutoff])
+        next_marker = cursor.fetchone()[0]
+
+    run = LogRetentionRun.objects.create(cutoff=cutoff, marker=marker, last_build_id=max_id)
+
+    start = marker
+    while start <= max_id:
+        end = start + chunk_size
+        yield clear_logs('builds_build.id >= %s AND builds_build.id < %s', [start, end],
+                         cutoff, keep_ids)
+        run.marker = min(end, next_marker)
+        run.save(update_fields=['marker', 'updated_at'])
+        start = end
+
+    run.marker = next_marker
+    run.save(update_fields=['marker', 'updated_at'])
+    logger.info('Cleared old logs up to build {0}'.format(next_marker))
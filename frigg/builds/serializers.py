@@ -1,5 +1,9 @@
+import json
+from operator import itemgetter
+
 from rest_framework import serializers
 
+from frigg.deployments.models import PRDeployment
 from frigg.deployments.serializers import PRDeploymentSerializer
 from frigg.projects.models import Project
 
@@ -35,8 +39,25 @@ class BuildResultSerializer(serializers.ModelSerializer):
         )
 
 
+class BuildResultSummarySerializer(serializers.ModelSerializer):
+    task_count = serializers.ReadOnlyField(source='build.task_count')
+    failing_tasks = serializers.ReadOnlyField(source='build.failing_tasks')
+
+    class Meta:
+        model = BuildResult
+        fields = (
+            'id',
+            'coverage',
+            'succeeded',
+            'still_running',
+            'worker_host',
+            'task_count',
+            'failing_tasks',
+        )
+
+
 class BuildInlineSerializer(serializers.ModelSerializer):
-    result = BuildResultSerializer(read_only=True)
+    result = BuildResultSummarySerializer(read_only=True)
     deployment = PRDeploymentSerializer(read_only=True)
 
     class Meta:
@@ -85,3 +106,150 @@ class BuildSerializer(serializers.ModelSerializer):
             'commit_url',
             'deployment',
         )
+
+
+class BuildSummarySerializer(BuildSerializer):
+    result = BuildResultSummarySerializer(read_only=True)
+
+
+datetime_field = serializers.DateTimeField()
+coverage_field = serializers.DecimalField(max_digits=5, decimal_places=2)
+
+
+def serialize_build_summaries(builds, fields=None):
+    """
+    Serializes the dictionaries from ``BuildQuerySet.summary_values`` into the same
+    representation as ``BuildSummarySerializer``. It is used by the hot read-only listings
+    where the overhead of model instances and serializer fields dominates. Only the given
+    fields are serialized if ``fields`` is set.
+    """
+    representation = [field for field in BUILD_SUMMARY_REPRESENTATION
+                      if fields is None or field[0] in fields]
+    return [_serialize_build_summary(build, representation) for build in builds]
+
+
+def get_summary_columns(fields=None):
+    """
+    Returns the columns ``summary_values`` has to select to serialize the given fields.
+    """
+    columns = {'id'}
+    for name, field_columns, serialize in BUILD_SUMMARY_REPRESENTATION:
+        if fields is None or name in fields:
+            columns.update(field_columns)
+    return sorted(columns)
+
+
+def _serialize_build_summary(build, representation):
+    data = {}
+    for name, columns, serialize in representation:
+        # Like the serializer, leave out the short message of builds without a message.
+        if name == 'short_message' and build['message'] is None:
+            continue
+        data[name] = serialize(build)
+    return data
+
+
+def _serialize_project(build):
+    return {
+        'id': build['project__id'],
+        'owner': build['project__owner'],
+        'name': build['project__name'],
+        'private': build['project__private'],
+        'approved': build['project__approved'],
+    }
+
+
+def _serialize_result_summary(build):
+    if build['result__id'] is None:
+        return None
+    coverage = build['result__coverage']
+    return {
+        'id': build['result__id'],
+        'coverage': coverage_field.to_representation(coverage) if coverage is not None else None,
+        'succeeded': build['result__succeeded'],
+        'still_running': build['result__still_running'],
+        'worker_host': build['result__worker_host'],
+        'task_count': build['result_task_count'],
+        'failing_tasks': build['result_failing_tasks'],
+    }
+
+
+def _serialize_deployment(build):
+    if build['deployment__id'] is None:
+        return None
+    start_time = build['deployment__start_time']
+    succeeded = build['deployment__succeeded']
+    ttl = PRDeployment.get_ttl(build['project__owner'])
+    return {
+        'id': build['deployment__id'],
+        'image': build['deployment__image'],
+        'tasks': json.loads(build['deployment__log'] or '[]'),
+        'port': build['deployment__port'],
+        'succeeded': succeeded,
+        'start_time': _serialize_datetime(start_time),
+        'ttl': ttl,
+        'is_pending': succeeded is None,
+        'is_alive': PRDeployment.get_is_alive(start_time, succeeded, build['project__owner']),
+    }
+
+
+def _serialize_datetime(value):
+    return datetime_field.to_representation(value) if value is not None else None
+
+
+def _build_color(build):
+    if build['result__id'] is None or build['result__still_running']:
+        return 'orange'
+    if build['result__succeeded']:
+        return 'green'
+    if build['result_first_task'] == '':
+        return 'gray'
+    return 'red'
+
+
+def _pull_request_url(build):
+    if build['pull_request_id'] > 0:
+        return 'https://github.com/%s/%s/pull/%s' % (build['project__owner'],
+                                                     build['project__name'],
+                                                     build['pull_request_id'])
+    return 'https://github.com/%s/%s' % (build['project__owner'], build['project__name'])
+
+
+def _commit_url(build):
+    return 'https://github.com/%s/%s/commit/%s/' % (build['project__owner'],
+                                                    build['project__name'], build['sha'])
+
+
+def _column(name, serialize=None):
+    if serialize is None:
+        return name, (name,), itemgetter(name)
+    return name, (name,), lambda build: serialize(build[name])
+
+
+# The fields of the fast build summaries with the columns they need and how they are
+# serialized, in the order of ``BuildSummarySerializer``.
+BUILD_SUMMARY_REPRESENTATION = (
+    _column('id'),
+    ('project', ('project__id', 'project__owner', 'project__name', 'project__private',
+                 'project__approved'), _serialize_project),
+    ('result', ('result__id', 'result__coverage', 'result__succeeded',
+                'result__still_running', 'result__worker_host', 'result_task_count',
+                'result_failing_tasks'), _serialize_result_summary),
+    _column('build_number'),
+    _column('branch'),
+    _column('pull_request_id'),
+    _column('sha'),
+    _column('start_time', _serialize_datetime),
+    _column('end_time', _serialize_datetime),
+    ('short_message', ('message',), lambda build: build['message'].split('\n')[0]),
+    _column('message'),
+    _column('author'),
+    ('color', ('result__id', 'result__still_running', 'result__succeeded',
+               'result_first_task'), _build_color),
+    ('pull_request_url', ('pull_request_id', 'project__owner', 'project__name'),
+     _pull_request_url),
+    ('commit_url', ('sha', 'project__owner', 'project__name'), _commit_url),
+    ('deployment', ('deployment__id', 'deployment__image', 'deployment__log',
+                    'deployment__port', 'deployment__succeeded', 'deployment__start_time',
+                    'project__owner'), _serialize_deployment),
+)
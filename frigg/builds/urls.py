@@ -8,6 +8,11 @@ urlpatterns = [
         views.last_build,
         name='last_build'
     ),
+    url(
+        r'^(?P<owner>[^/]+)/(?P<name>[^/]+)/builds\.(?P<export_format>ndjson|csv)$',
+        views.export_build_history,
+        name='export_build_history'
+    ),
     url(
         r'^artifacts/(?P<owner>[^/]+)/(?P<name>[^/]+)/(?P<artifact>.*)$',
         views.download_artifact,
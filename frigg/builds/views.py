@@ -1,6 +1,7 @@
-from django.http import Http404, HttpResponse
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect
 
+from .export import CONTENT_TYPES, export_builds
 from .models import Project
 
 
@@ -17,3 +18,16 @@ def download_artifact(request, owner, name, artifact):
     response['X-Accel-Redirect'] = '/protected' + request.path_info
     response['Content-Disposition'] = 'attachment; filename="%s"' % artifact
     return response
+
+
+def export_build_history(request, owner, name, export_format):
+    projects = Project.objects.all() if request.user.is_staff else \
+        Project.objects.permitted(request.user)
+    project = get_object_or_404(projects, owner=owner, name=name)
+
+    response = StreamingHttpResponse(export_builds(project, export_format),
+                                     content_type=CONTENT_TYPES[export_format])
+    response['Content-Disposition'] = 'attachment; filename="%s-%s-builds.%s"' % (
+        owner, name, export_format
+    )
+    return response
@@ -7,6 +7,7 @@ from frigg.deployments.models import PRDeployment
 @admin.register(PRDeployment)
 class PRDeploymentAdmin(admin.ModelAdmin):
     list_display = ('__str__', 'succeeded', 'port', 'ttl', 'image')
+    list_select_related = ('build__project',)
     list_filter = ['build__project']
     actions = ['redeploy']
 
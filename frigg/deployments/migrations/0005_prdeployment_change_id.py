@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('builds', '0034_change_ids'),
+        ('deployments', '0004_auto_20150725_1456'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='prdeployment',
+            name='change_id',
+            field=models.BigIntegerField(db_index=True, editable=False, null=True),
+        ),
+        migrations.RunSQL(
+            '''
+            CREATE TRIGGER deployments_prdeployment_change_id
+            BEFORE INSERT OR UPDATE ON deployments_prdeployment
+            FOR EACH ROW EXECUTE PROCEDURE frigg_set_change_id();
+            ''',
+            'DROP TRIGGER deployments_prdeployment_change_id ON deployments_prdeployment;'
+        ),
+    ]
@@ -19,6 +19,7 @@ class PRDeployment(models.Model):
     succeeded = models.NullBooleanField()
     docker_id = models.CharField(max_length=150, blank=True)
     start_time = models.DateTimeField(blank=True, null=True)
+    change_id = models.BigIntegerField(null=True, editable=False, db_index=True)
 
     objects = PRDeploymentManager()
 
@@ -34,16 +35,24 @@ class PRDeployment(models.Model):
 
     @property
     def ttl(self):
-        if self.build.project.owner == 'frigg':
+        return self.get_ttl(self.build.project.owner)
+
+    @staticmethod
+    def get_ttl(owner):
+        if owner == 'frigg':
             return 86400
         # This value should be calculated based on the owner
         return 1800
 
     @property
     def is_alive(self):
-        if self.start_time is None:
+        return self.get_is_alive(self.start_time, self.succeeded, self.build.project.owner)
+
+    @classmethod
+    def get_is_alive(cls, start_time, succeeded, owner):
+        if start_time is None:
             return False
-        return bool(self.succeeded) and self.start_time + timedelta(seconds=self.ttl) > now()
+        return bool(succeeded) and start_time + timedelta(seconds=cls.get_ttl(owner)) > now()
 
     @property
     def is_pending(self):
@@ -95,6 +104,7 @@ class PRDeployment(models.Model):
                 break
 
         self.save()
+        self.build.project.bump_cache_version(self.build.project_id)
 
         if self.succeeded is True or self.succeeded is False:
             github.set_commit_status(self.build, context='frigg-preview')
@@ -1,8 +1,46 @@
 # -*- coding: utf8 -*-
-import requests
+from functools import lru_cache
+from xml.sax.saxutils import escape
+
 from django.contrib.staticfiles import finders
 from django.core.cache import cache
 
+BADGE_TEMPLATE = (
+    '<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="20">'
+    '<linearGradient id="a" x2="0" y2="100%"><stop offset="0" stop-color="#bbb" '
+    'stop-opacity=".1"/><stop offset="1" stop-opacity=".1"/></linearGradient>'
+    '<rect rx="3" width="{width}" height="20" fill="#555"/>'
+    '<rect rx="3" x="{label_width}" width="{value_width}" height="20" fill="{color}"/>'
+    '<path fill="{color}" d="M{label_width} 0h4v20h-4z"/>'
+    '<rect rx="3" width="{width}" height="20" fill="url(#a)"/>'
+    '<g fill="#fff" text-anchor="middle" font-family="DejaVu Sans,Verdana,Geneva,sans-serif" '
+    'font-size="11">'
+    '<text x="{label_x}" y="15" fill="#010101" fill-opacity=".3">{label}</text>'
+    '<text x="{label_x}" y="14">{label}</text>'
+    '<text x="{value_x}" y="15" fill="#010101" fill-opacity=".3">{value}</text>'
+    '<text x="{value_x}" y="14">{value}</text></g></svg>'
+)
+
+COLORS = {
+    'brightgreen': '#4c1',
+    'green': '#97CA00',
+    'yellow': '#dfb317',
+    'orange': '#fe7d37',
+    'red': '#e05d44',
+    'lightgrey': '#9f9f9f',
+}
+
+# Widths in pixels of characters in Verdana 11px, the font used in the badges.
+CHARACTER_WIDTHS = {
+    ' ': 3.9, '%': 11.9, '-': 5.0, '.': 4.0, '/': 5.0, ':': 5.0, '_': 7.0,
+    'a': 6.6, 'b': 6.9, 'c': 5.7, 'd': 6.9, 'e': 6.5, 'f': 3.7, 'g': 6.9, 'h': 7.0,
+    'i': 3.0, 'j': 3.8, 'k': 6.5, 'l': 3.0, 'm': 10.7, 'n': 7.0, 'o': 6.7, 'p': 6.9,
+    'q': 6.9, 'r': 4.7, 's': 5.7, 't': 4.3, 'u': 7.0, 'v': 6.5, 'w': 9.0, 'x': 6.5,
+    'y': 6.5, 'z': 5.8,
+}
+CHARACTER_WIDTHS.update({digit: 7.0 for digit in '0123456789'})
+DEFAULT_CHARACTER_WIDTH = 7.5
+
 
 def get_badge(succeeded):
     key = 'badge{0}'.format(succeeded)
@@ -22,26 +60,31 @@ def get_badge(succeeded):
 def get_coverage_badge(coverage):
     if coverage is None:
         return get_unknown_badge('coverage')
-    key = 'badgecoverage{0}'.format(coverage)
-    badge = cache.get(key)
-    if badge is None:
-        url = 'https://img.shields.io/badge/coverage-{}%-{}.svg?style=flat'.format(
-            coverage,
-            _coverage_color(coverage)
-        )
-        badge = requests.get(url).text
-        cache.set(key, badge)
-    return badge
+    return render_badge('coverage', '{}%'.format(coverage), _coverage_color(coverage))
 
 
 def get_unknown_badge(badge_type):
-    key = 'badgeunknown{0}'.format(badge_type)
-    badge = cache.get(key)
-    if badge is None:
-        url = 'https://img.shields.io/badge/{0}-unknown-lightgrey.svg'.format(badge_type)
-        badge = requests.get(url).text
-        cache.set(key, badge)
-    return badge
+    return render_badge(badge_type, 'unknown', 'lightgrey')
+
+
+@lru_cache(maxsize=512)
+def render_badge(label, value, color):
+    label_width = _text_width(label) + 10
+    value_width = _text_width(value) + 10
+    return BADGE_TEMPLATE.format(
+        width=label_width + value_width,
+        label_width=label_width,
+        value_width=value_width,
+        label_x=label_width / 2,
+        value_x=label_width + value_width / 2,
+        label=escape(label),
+        value=escape(value),
+        color=COLORS.get(color, color),
+    )
+
+
+def _text_width(text):
+    return round(sum(CHARACTER_WIDTHS.get(c, DEFAULT_CHARACTER_WIDTH) for c in text))
 
 
 def _coverage_color(coverage):
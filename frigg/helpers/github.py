@@ -1,8 +1,15 @@
 # -*- coding: utf8 -*-
 import json
+import logging
 
+import redis
 import requests
 from django.conf import settings
+from django.core.cache import cache
+
+from frigg.helpers import http
+
+logger = logging.getLogger(__name__)
 
 
 def get_pull_request_url(build):
@@ -40,7 +47,7 @@ def set_commit_status(build, pending=False, error=None, context='frigg'):
     else:
         raise RuntimeError('Unknown context')
 
-    return api_request(url, build.project.github_token, {
+    return queue_commit_status(url, build.project_id, {
         'state': status,
         'target_url': target_url,
         'description': description,
@@ -48,7 +55,108 @@ def set_commit_status(build, pending=False, error=None, context='frigg'):
     })
 
 
-def update_repo_permissions(user):
+def queue_commit_status(url, project_id, data):
+    """
+    Puts the status in the outbox and posts it, unless it is identical to the last status
+    posted for the same commit and context. Pending statuses within the coalescing window of
+    an earlier post are left in the outbox, where they are replaced by newer statuses until
+    ``flush_commit_statuses`` posts them. The outbox only refers to the project, the token
+    is looked up when the status is posted.
+    """
+    r = redis.Redis(**settings.REDIS_SETTINGS)
+    key = '{0}:{1}'.format(url, data['context'])
+
+    last = r.get('frigg:statuses:last:{0}'.format(key))
+    if last is not None and json.loads(last.decode())['data'] == data:
+        r.hdel(settings.FRIGG_COMMIT_STATUS_OUTBOX, key)
+        return
+
+    r.hset(settings.FRIGG_COMMIT_STATUS_OUTBOX, key, json.dumps({
+        'url': url,
+        'project': project_id,
+        'data': data,
+        'sequence': r.incr('frigg:statuses:sequence'),
+    }))
+
+    if data['state'] == 'pending' and r.exists('frigg:statuses:window:{0}'.format(key)):
+        return
+
+    return flush_commit_status(key, r)
+
+
+def flush_commit_status(key, r):
+    """
+    Posts the status in the outbox for the given commit and context. Statuses of the same
+    commit and context are posted one at a time under a lock and the entry is read after
+    taking it, so a status is never posted after a newer one.
+    """
+    lock = 'frigg:statuses:lock:{0}'.format(key)
+    if not r.set(lock, 1, ex=settings.FRIGG_COMMIT_STATUS_LOCK_TIMEOUT, nx=True):
+        return
+    try:
+        return _post_commit_status(key, r)
+    finally:
+        r.delete(lock)
+
+
+def _post_commit_status(key, r):
+    from frigg.builds.models import Project
+
+    entry = r.hget(settings.FRIGG_COMMIT_STATUS_OUTBOX, key)
+    if entry is None:
+        return
+    item = json.loads(entry.decode())
+
+    last = r.get('frigg:statuses:last:{0}'.format(key))
+    if last is not None and json.loads(last.decode())['sequence'] > item['sequence']:
+        r.hdel(settings.FRIGG_COMMIT_STATUS_OUTBOX, key)
+        return
+
+    try:
+        project = Project.objects.get(pk=item['project'])
+    except Project.DoesNotExist:
+        r.hdel(settings.FRIGG_COMMIT_STATUS_OUTBOX, key)
+        return
+
+    try:
+        response = api_request(item['url'], project.github_token, item['data'])
+    except requests.RequestException as error:
+        logger.warning('Could not post commit status, will retry', extra={'error': error})
+        return
+
+    if response.status_code >= 500:
+        logger.warning('Github responded with {0}, will retry'.format(response.status_code))
+        return response
+
+    if r.hget(settings.FRIGG_COMMIT_STATUS_OUTBOX, key) == entry:
+        r.hdel(settings.FRIGG_COMMIT_STATUS_OUTBOX, key)
+
+    if response.ok:
+        r.set('frigg:statuses:last:{0}'.format(key), json.dumps({
+            'sequence': item['sequence'],
+            'data': item['data'],
+        }), ex=60 * 60 * 24 * 7)
+        r.set('frigg:statuses:window:{0}'.format(key), 1,
+              ex=settings.FRIGG_COMMIT_STATUS_COALESCE_WINDOW)
+
+    return response
+
+
+def flush_commit_statuses():
+    r = redis.Redis(**settings.REDIS_SETTINGS)
+    for key in r.hkeys(settings.FRIGG_COMMIT_STATUS_OUTBOX):
+        key = key.decode()
+        if not r.exists('frigg:statuses:window:{0}'.format(key)):
+            flush_commit_status(key, r)
+
+
+def update_repo_permissions(user, remove_stale=False):
+    """
+    Syncs the project memberships of the user with the repositories the user can access on
+    github. The sync is done as set operations in a constant number of queries regardless of
+    the number of repositories. Memberships of projects no longer accessible are removed if
+    ``remove_stale`` is set.
+    """
     from frigg.builds.models import Project
 
     repos = list_user_repos(user)
@@ -56,12 +164,22 @@ def update_repo_permissions(user):
     for org in list_organization(user):
         repos += list_organization_repos(user.github_token, org['login'])
 
-    for repo in repos:
-        try:
-            project = Project.objects.get(owner=repo['owner']['login'], name=repo['name'])
-            project.members.add(user)
-        except Project.DoesNotExist:
-            pass
+    pairs = {(repo['owner']['login'], repo['name']) for repo in repos}
+    candidates = Project.objects.filter(
+        owner__in={owner for owner, name in pairs},
+        name__in={name for owner, name in pairs}
+    ).values_list('pk', 'owner', 'name')
+    project_ids = {pk for pk, owner, name in candidates if (owner, name) in pairs}
+
+    membership = Project.members.through
+    existing = set(membership.objects.filter(user=user).values_list('project_id', flat=True))
+
+    Project.add_memberships((project_id, user.pk) for project_id in project_ids - existing)
+
+    if remove_stale:
+        membership.objects.filter(user=user, project_id__in=existing - project_ids).delete()
+
+    cache.delete('projects:permitted:{}'.format(user.username))
 
 
 def list_user_repos(user):
@@ -135,13 +253,13 @@ def api_request(url, token, data=None, page=None):
     if page:
         url += '&page=%s' % page
     if data is None:
-        response = requests.get(url)
+        response = http.get(url)
     else:
         headers = {
             'Content-type': 'application/json',
             'Accept': 'application/vnd.github.she-hulk-preview+json'
         }
-        response = requests.post(url, data=json.dumps(data), headers=headers)
+        response = http.post(url, data=json.dumps(data), headers=headers)
 
     if settings.DEBUG:
         print((response.headers.get('X-RateLimit-Remaining')))
@@ -0,0 +1,130 @@
+# -*- coding: utf8 -*-
+import logging
+from urllib.parse import urlparse
+
+import redis
+import requests
+from django.conf import settings
+from django_statsd.clients import statsd
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+STATE_GAUGES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpenError(requests.RequestException):
+    pass
+
+
+class CircuitBreaker(object):
+    """
+    A circuit breaker for a single host. The state is kept in redis so that every process
+    agrees on it. After ``failure_threshold`` consecutive failures the circuit opens and
+    requests fail fast for ``reset_timeout`` seconds, then a single trial request is let
+    through (half-open) which either closes the circuit or opens it again.
+    """
+
+    def __init__(self, host):
+        self.host = host
+        self.redis = redis.Redis(**settings.REDIS_SETTINGS)
+        self.failure_threshold = settings.FRIGG_CIRCUIT_BREAKER['failure_threshold']
+        self.reset_timeout = settings.FRIGG_CIRCUIT_BREAKER['reset_timeout']
+
+    def _key(self, name):
+        return 'frigg:breaker:{0}:{1}'.format(self.host, name)
+
+    @property
+    def failures(self):
+        return int(self.redis.get(self._key('failures')) or 0)
+
+    @property
+    def state(self):
+        if self.redis.exists(self._key('open')):
+            return OPEN
+        if self.failures >= self.failure_threshold:
+            return HALF_OPEN
+        return CLOSED
+
+    def allow_request(self):
+        try:
+            state = self.state
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN:
+                return bool(self.redis.set(self._key('trial'), 1, ex=self.reset_timeout, nx=True))
+        except redis.RedisError as error:
+            logger.warning('Could not read circuit breaker state', extra={'error': error})
+            return True
+        return False
+
+    def record_success(self):
+        try:
+            if self.failures:
+                self.redis.delete(self._key('failures'), self._key('trial'))
+                self._export(CLOSED)
+        except redis.RedisError as error:
+            logger.warning('Could not record circuit breaker success', extra={'error': error})
+
+    def record_failure(self):
+        statsd.incr('http.{0}.failures'.format(self.metric_name))
+        try:
+            failures = self.redis.incr(self._key('failures'))
+            self.redis.expire(self._key('failures'), self.reset_timeout * 10)
+            if failures >= self.failure_threshold:
+                self.redis.set(self._key('open'), 1, ex=self.reset_timeout)
+                self.redis.delete(self._key('trial'))
+                self._export(OPEN)
+        except redis.RedisError as error:
+            logger.warning('Could not record circuit breaker failure', extra={'error': error})
+
+    @property
+    def metric_name(self):
+        return self.host.replace('.', '_')
+
+    def _export(self, state):
+        logger.info('Circuit breaker for {0} is {1}'.format(self.host, state))
+        statsd.gauge('http.{0}.breaker'.format(self.metric_name), STATE_GAUGES[state])
+
+
+def get_timeout(host):
+    timeouts = settings.FRIGG_HTTP_TIMEOUTS
+    return timeouts.get(host, timeouts['default'])
+
+
+def request(method, url, **kwargs):
+    """
+    Wrapper around ``requests.request`` that should be used for all outbound requests. It
+    sets the timeout for the host and raises ``CircuitOpenError`` without doing the request
+    if the host has failed repeatedly.
+    """
+    host = urlparse(url).hostname
+    breaker = CircuitBreaker(host)
+
+    if not breaker.allow_request():
+        statsd.incr('http.{0}.fast_fail'.format(breaker.metric_name))
+        raise CircuitOpenError('Circuit breaker for {0} is open'.format(host))
+
+    kwargs.setdefault('timeout', get_timeout(host))
+    try:
+        response = requests.request(method, url, **kwargs)
+    except requests.RequestException:
+        breaker.record_failure()
+        raise
+
+    if response.status_code >= 500:
+        breaker.record_failure()
+    else:
+        breaker.record_success()
+    return response
+
+
+def get(url, **kwargs):
+    return request('get', url, **kwargs)
+
+
+def post(url, **kwargs):
+    return request('post', url, **kwargs)
@@ -0,0 +1,22 @@
+from time import sleep
+
+from django.conf import settings
+from django.core.management import BaseCommand
+
+from frigg.helpers import github
+
+
+class Command(BaseCommand):
+    help = 'Post coalesced and failed commit statuses from the outbox.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--number', action='store', type=int, dest='number', default='-1')
+
+    def handle(self, *args, **options):
+        counter = 0
+
+        while options['number'] == -1 or counter < options['number']:
+            github.flush_commit_statuses()
+            counter += 1
+            if options['number'] == -1 or counter < options['number']:
+                sleep(settings.FRIGG_COMMIT_STATUS_COALESCE_WINDOW)
@@ -1,9 +1,17 @@
 from django.contrib import admin
 from django.template.defaultfilters import pluralize
 
+from frigg.builds.models import Build
+
 from .forms import EnvironmentVariableForm
 from .models import EnvironmentVariable, Project
 
+CHANGELIST_SUBQUERIES = {
+    'members_count': 'SELECT COUNT(*) FROM {members} WHERE {members}.project_id = {projects}.id',
+    'max_build_number': 'SELECT MAX(build_number) FROM {builds} '
+                        'WHERE {builds}.project_id = {projects}.id',
+}
+
 
 class EnvironmentVariableMixin:
     form = EnvironmentVariableForm
@@ -28,9 +36,30 @@ class ProjectAdmin(admin.ModelAdmin):
     actions = ['sync_members']
     inlines = [EnvironmentVariableInline]
 
+    def get_queryset(self, request):
+        """
+        Annotates the values shown in the changelist with correlated subqueries, which keeps
+        the number of queries constant regardless of the number of projects shown.
+        """
+        tables = {
+            'members': Project.members.through._meta.db_table,
+            'builds': Build._meta.db_table,
+            'projects': Project._meta.db_table,
+        }
+        return super().get_queryset(request).extra(select={
+            name: sql.format(**tables) for name, sql in CHANGELIST_SUBQUERIES.items()
+        })
+
+    def number_of_members(self, obj):
+        return obj.members_count
+
+    number_of_members.admin_order_field = 'members_count'
+
+    def last_build_number(self, obj):
+        return obj.max_build_number or 0
+
     def sync_members(self, request, queryset):
-        for project in queryset:
-            project.update_members()
+        Project.sync_members(queryset)
 
         self.message_user(
             request,
@@ -5,4 +5,4 @@ from .models import Project
 
 class ProjectPermissionFilter(filters.BaseFilterBackend):
     def filter_queryset(self, request, queryset, view):
-        return queryset.filter(Project.objects.permitted_query(request.user)).distinct()
+        return queryset.filter(Project.objects.permitted_query(request.user))
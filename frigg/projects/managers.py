@@ -1,4 +1,8 @@
 # -*- coding: utf8 -*-
+from array import array
+
+from django.conf import settings
+from django.core.cache import cache
 from django.db import models
 from django.db.models import Q
 
@@ -9,7 +13,7 @@ class PermittedManager(models.Manager):
         raise NotImplementedError
 
     def permitted(self, user):
-        return self.filter(self.permitted_query(user)).distinct()
+        return self.filter(self.permitted_query(user))
 
 
 class ProjectManager(PermittedManager):
@@ -17,5 +21,24 @@ class ProjectManager(PermittedManager):
     def permitted_query(self, user):
         query = Q(private=False)
         if user.is_authenticated():
-            query |= Q(members=user)
+            query |= Q(pk__in=self.member_projects(user))
         return query
+
+    def member_projects(self, user):
+        """
+        Returns the ids of the projects the user is a member of for use in ``__in`` lookups.
+        The ids are cached as a compact array until the memberships of the user change. Users
+        with more than ``FRIGG_PERMITTED_IDS_INLINE_LIMIT`` projects get a subquery on the
+        memberships instead, to keep the queries from growing with the number of projects.
+        """
+        memberships = self.model.members.through.objects.filter(user_id=user.pk)
+        key = 'projects:permitted:{}'.format(user.username)
+
+        ids = cache.get(key)
+        if ids is None:
+            ids = array('L', sorted(memberships.values_list('project_id', flat=True)))
+            cache.set(key, ids, 60 * 10)
+
+        if len(ids) > settings.FRIGG_PERMITTED_IDS_INLINE_LIMIT:
+            return memberships.values('project_id')
+        return list(ids)
@@ -24,7 +24,7 @@ class EnvironmentVariableSerializer(serializers.ModelSerializer):
 
 
 class ProjectSerializer(serializers.ModelSerializer):
-    builds = BuildInlineSerializer(read_only=True, many=True)
+    builds = BuildInlineSerializer(read_only=True, many=True, source='recent_builds')
 
     class Meta:
         model = Project
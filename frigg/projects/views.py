@@ -1,25 +1,63 @@
+import hashlib
+
+from django.conf import settings
 from django.http import Http404, HttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
-from django.views.decorators.cache import never_cache
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from django.views.decorators.cache import cache_control
 from django.views.decorators.csrf import csrf_exempt
 
+from frigg.helpers.badges import get_badge, get_coverage_badge, get_unknown_badge
+
 from .models import Project
 
+badge_cache_control = cache_control(
+    public=True,
+    max_age=settings.FRIGG_BADGE_MAX_AGE,
+    stale_while_revalidate=settings.FRIGG_BADGE_STALE_WHILE_REVALIDATE
+)
+
+
+def badge_response(request, owner, name, branch, badge_type):
+    """
+    Creates a response for the badge with a strong ETag based on the last result of the branch.
+    Requests with a matching If-None-Match header gets a 304 without rendering the badge.
+    """
+    project = get_object_or_404(Project, owner=owner, name=name)
+    result = project.get_last_result(branch)
+
+    etag = hashlib.md5('{0}:{1}:{2}:{3}'.format(
+        project.pk,
+        branch,
+        badge_type,
+        '{build_id}:{succeeded}:{coverage}'.format(**result) if result else None
+    ).encode()).hexdigest()
 
-@never_cache
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        if result is None:
+            badge = get_unknown_badge(badge_type)
+        elif badge_type == 'coverage':
+            badge = get_coverage_badge(result['coverage'])
+        else:
+            badge = get_badge(result['succeeded'])
+        response = HttpResponse(content=badge, content_type='image/svg+xml')
+
+    response['ETag'] = quote_etag(etag)
+    return response
+
+
+@badge_cache_control
 @csrf_exempt
 def build_badge(request, owner, name, branch='master'):
-    project = get_object_or_404(Project, owner=owner, name=name)
-    badge = project.get_badge(branch)
-    return HttpResponse(content=badge, content_type='image/svg+xml')
+    return badge_response(request, owner, name, branch, 'build')
 
 
-@never_cache
+@badge_cache_control
 @csrf_exempt
 def coverage_badge(request, owner, name, branch='master'):
-    project = get_object_or_404(Project, owner=owner, name=name)
-    badge = project.get_coverage_badge(branch)
-    return HttpResponse(content=badge, content_type='image/svg+xml')
+    return badge_response(request, owner, name, branch, 'coverage')
 
 
 def approve_projects(request, project_id=None):
@@ -11,6 +11,15 @@ IGNORED_PULL_REQUEST_ACTIONS = ['closed', 'assigned', 'unassigned', 'labeled', '
 FRIGG_WORKER_QUEUE = 'frigg:queue'
 FRIGG_WEBHOOK_QUEUE = 'frigg:webhooks'
 FRIGG_WEBHOOK_FAILED_QUEUE = 'frigg:webhooks:failed'
+FRIGG_COMMIT_STATUS_OUTBOX = 'frigg:statuses:outbox'
+
+# Pending commit statuses posted within this many seconds of the previous status
+# for the same commit are coalesced and posted by flush_commit_statuses.
+FRIGG_COMMIT_STATUS_COALESCE_WINDOW = 10
+
+# Seconds a process may hold the lock for posting the statuses of a commit, which must be
+# longer than the timeout of the request to github.
+FRIGG_COMMIT_STATUS_LOCK_TIMEOUT = 60
 
 FRIGG_PREVIEW_IMAGE = 'frigg/frigg-test-base'
 
@@ -24,6 +33,56 @@ AUTO_APPROVE_OWNERS = ['frigg', 'frecar', 'relekang']
 
 OVERVIEW_PAGINATION_COUNT = 100
 
+# Members of more projects than this are filtered with a subquery on the memberships
+# instead of a list of project ids.
+FRIGG_PERMITTED_IDS_INLINE_LIMIT = 500
+
+# Number of projects per page and builds per project in the projects api.
+FRIGG_API_PROJECTS_PAGE_SIZE = 50
+FRIGG_API_BUILDS_PAGE_SIZE = 50
+FRIGG_API_PROJECT_BUILDS = 10
+
+# Maximum number of changes per response, the longest time in seconds a request to the
+# changes feed may wait for changes and how often it checks for them.
+FRIGG_CHANGES_LIMIT = 500
+FRIGG_CHANGES_MAX_TIMEOUT = 30
+FRIGG_CHANGES_POLL_INTERVAL = 1
+
+# Maximum number of build ids and commits in one request to the build lookup api.
+FRIGG_API_LOOKUP_LIMIT = 100
+
+# Anonymous api responses are cached until the builds of the project change, this is
+# only an upper bound in seconds.
+FRIGG_API_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Number of minutes shown in the live stats.
+FRIGG_LIVE_STATS_MINUTES = 60
+
+# Cache-Control for badges, in seconds.
+FRIGG_BADGE_MAX_AGE = 60
+FRIGG_BADGE_STALE_WHILE_REVALIDATE = 300
+
 DEFAULT_BUILD_IMAGE = "frigg/frigg-test-base"
 
 FRIGG_KEEP_BUILD_LOGS_TIMEDELTA = 30 * 24
+
+# The output of tasks reported by the workers is truncated to these sizes in bytes, keeping
+# the start and the end of the output. Projects can override them.
+FRIGG_LOG_LIMITS = {
+    'task': 1024 * 1024,
+    'build': 10 * 1024 * 1024,
+}
+
+# Older logs are moved to compressed files in this directory.
+FRIGG_LOG_ARCHIVE_DIRECTORY = '/home/ubuntu/log_archive/'
+
+# Timeouts in seconds for outbound requests, by host.
+FRIGG_HTTP_TIMEOUTS = {
+    'api.github.com': 10,
+    'default': 5,
+}
+
+FRIGG_CIRCUIT_BREAKER = {
+    'failure_threshold': 5,
+    'reset_timeout': 30,
+}
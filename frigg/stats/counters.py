@@ -0,0 +1,97 @@
+# -*- coding: utf8 -*-
+import logging
+import time
+from collections import Counter
+
+import redis
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+BUCKET_KEY = 'frigg:stats:minute:{0}'
+QUEUES_KEY = 'frigg:stats:queues'
+RUNNING_KEY = 'frigg:stats:running'
+
+
+def _current_minute():
+    return int(time.time() // 60)
+
+
+def increment(name, amount=1):
+    """
+    Increments the counter with the given name in the bucket of the current minute. Errors
+    are logged and ignored since the counters should never break a request.
+    """
+    key = BUCKET_KEY.format(_current_minute())
+    try:
+        pipe = redis.Redis(**settings.REDIS_SETTINGS).pipeline()
+        pipe.hincrby(key, name, amount)
+        pipe.expire(key, settings.FRIGG_LIVE_STATS_MINUTES * 60 + 60)
+        pipe.execute()
+    except redis.RedisError as error:
+        logger.warning('Could not increment counter {0}'.format(name), extra={'error': error})
+
+
+def build_started(build):
+    increment('builds_started')
+    try:
+        r = redis.Redis(**settings.REDIS_SETTINGS)
+        r.sadd(QUEUES_KEY, build.project.queue_name)
+        r.hdel(RUNNING_KEY, build.pk)
+    except redis.RedisError as error:
+        logger.warning('Could not update live stats', extra={'error': error})
+
+
+def build_reported(build, result):
+    try:
+        r = redis.Redis(**settings.REDIS_SETTINGS)
+        if result.still_running:
+            r.hset(RUNNING_KEY, build.pk, result.worker_host or 'unknown')
+            r.expire(RUNNING_KEY, 60 * 60 * 24)
+        else:
+            r.hdel(RUNNING_KEY, build.pk)
+    except redis.RedisError as error:
+        logger.warning('Could not update live stats', extra={'error': error})
+
+    if not result.still_running:
+        increment('builds_finished')
+
+
+def webhook_received():
+    increment('webhooks')
+
+
+def get_live_stats(minutes=None):
+    """
+    Reads the counters for the last minutes together with current queue lengths and running
+    builds per worker host. It reads one hash per minute and does not touch the database.
+    """
+    minutes = minutes or settings.FRIGG_LIVE_STATS_MINUTES
+    current = _current_minute()
+    r = redis.Redis(**settings.REDIS_SETTINGS)
+
+    pipe = r.pipeline()
+    for minute in range(current - minutes + 1, current + 1):
+        pipe.hgetall(BUCKET_KEY.format(minute))
+    buckets = pipe.execute()
+
+    per_minute = []
+    for index, bucket in enumerate(buckets):
+        values = {key.decode(): int(value) for key, value in bucket.items()}
+        per_minute.append({
+            'time': (current - minutes + 1 + index) * 60,
+            'builds_started': values.get('builds_started', 0),
+            'builds_finished': values.get('builds_finished', 0),
+            'webhooks': values.get('webhooks', 0),
+        })
+
+    queues = sorted(queue.decode() for queue in r.smembers(QUEUES_KEY))
+    pipe = r.pipeline()
+    for queue in queues:
+        pipe.llen(queue)
+
+    return {
+        'per_minute': per_minute,
+        'queues': dict(zip(queues, pipe.execute())),
+        'running': dict(Counter(host.decode() for host in r.hvals(RUNNING_KEY))),
+    }
@@ -0,0 +1,59 @@
+# -*- coding: utf8 -*-
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils.timezone import now
+
+from frigg.stats.models import DailyBuildStats
+
+ROLLUP_SQL = '''
+    INSERT INTO {table} (date, project_id, started, succeeded, failed, total_duration,
+                         coverage_sum, coverage_count)
+    SELECT day, project_id, sum(started), sum(succeeded), sum(failed),
+           sum(duration)::bigint, sum(coverage_sum), sum(coverage_count)
+    FROM (
+        SELECT date(created_at) AS day, project_id, 1 AS started, 0 AS succeeded,
+               0 AS failed, 0 AS duration, 0 AS coverage_sum, 0 AS coverage_count
+        FROM builds_build
+        WHERE project_id IS NOT NULL AND start_time IS NOT NULL
+          AND date(created_at) >= %(since)s
+        UNION ALL
+        SELECT date(b.end_time), b.project_id, 0,
+               CASE WHEN r.succeeded THEN 1 ELSE 0 END,
+               CASE WHEN r.succeeded THEN 0 ELSE 1 END,
+               COALESCE(extract(epoch FROM b.end_time - b.start_time)::bigint, 0),
+               COALESCE(r.coverage, 0),
+               CASE WHEN r.coverage IS NULL THEN 0 ELSE 1 END
+        FROM builds_build b
+        INNER JOIN builds_buildresult r ON r.build_id = b.id
+        WHERE b.project_id IS NOT NULL AND NOT r.still_running
+          AND date(b.end_time) >= %(since)s
+    ) AS builds
+    GROUP BY day, project_id
+'''
+
+
+class Command(BaseCommand):
+
+    help = 'Rebuilds the daily build stats from the builds table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', action='store', type=int, dest='days', default=None,
+                            help='Only rebuild the given number of days, defaults to all.')
+
+    def handle(self, *args, **options):
+        since = date(1970, 1, 1)
+        if options['days'] is not None:
+            since = (now() - timedelta(days=options['days'])).date()
+
+        with transaction.atomic():
+            DailyBuildStats.objects.filter(date__gte=since).delete()
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    ROLLUP_SQL.format(table=DailyBuildStats._meta.db_table),
+                    {'since': since}
+                )
+                self.stdout.write('Updated {0} rows of daily build stats'.format(
+                    cursor.rowcount
+                ))
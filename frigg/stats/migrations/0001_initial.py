@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    initial = True
+
+    dependencies = [
+        ('builds', '0033_branchstatus'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyBuildStats',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False,
+                                        verbose_name='ID')),
+                ('date', models.DateField(db_index=True)),
+                ('started', models.IntegerField(default=0)),
+                ('succeeded', models.IntegerField(default=0)),
+                ('failed', models.IntegerField(default=0)),
+                ('total_duration', models.BigIntegerField(default=0)),
+                ('coverage_sum', models.DecimalField(decimal_places=2, default=0,
+                                                     max_digits=12)),
+                ('coverage_count', models.IntegerField(default=0)),
+                ('project', models.ForeignKey(
+                    on_delete=django.db.models.deletion.CASCADE,
+                    related_name='daily_stats',
+                    to='builds.Project'
+                )),
+            ],
+            options={
+                'verbose_name_plural': 'daily build stats',
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='dailybuildstats',
+            unique_together=set([('date', 'project')]),
+        ),
+    ]
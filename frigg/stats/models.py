@@ -0,0 +1,59 @@
+# -*- coding: utf8 -*-
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
+
+
+class DailyBuildStats(models.Model):
+    """
+    Rollup of the builds of a project on a given day. Builds are counted as started once, on
+    the day they were created, and as succeeded or failed on the day they finished. The
+    start time is reset by restarts, so it cannot tell when a build was first started.
+    """
+    date = models.DateField(db_index=True)
+    project = models.ForeignKey('builds.Project', related_name='daily_stats')
+    started = models.IntegerField(default=0)
+    succeeded = models.IntegerField(default=0)
+    failed = models.IntegerField(default=0)
+    total_duration = models.BigIntegerField(default=0)
+    coverage_sum = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    coverage_count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('date', 'project')
+        verbose_name_plural = 'daily build stats'
+
+    def __str__(self):
+        return '{0} {1}'.format(self.project, self.date)
+
+    @classmethod
+    def increment(cls, project_id, date, **increments):
+        values = {key: F(key) + value for key, value in increments.items()}
+        if cls.objects.filter(project_id=project_id, date=date).update(**values):
+            return
+
+        try:
+            with transaction.atomic():
+                cls.objects.create(project_id=project_id, date=date, **increments)
+        except IntegrityError:
+            cls.objects.filter(project_id=project_id, date=date).update(**values)
+
+    @classmethod
+    def record_started(cls, build):
+        cls.increment(build.project_id, build.created_at.date(), started=1)
+
+    @classmethod
+    def record_finished(cls, build, sign=1):
+        """
+        Adds the outcome of a finished build to the day it finished. A negative sign
+        removes it, which is used when a finished build is restarted.
+        """
+        increments = {'succeeded': 0, 'failed': 0}
+        increments['succeeded' if build.result.succeeded else 'failed'] = sign
+        if build.start_time:
+            increments['total_duration'] = sign * int(
+                (build.end_time - build.start_time).total_seconds()
+            )
+        if build.result.coverage is not None:
+            increments['coverage_sum'] = sign * build.result.coverage
+            increments['coverage_count'] = sign
+        cls.increment(build.project_id, build.end_time.date(), **increments)
@@ -4,4 +4,6 @@ from . import views
 
 urlpatterns = [
     url(r'^$', views.overview, name='overview'),
+    url(r'^live/$', views.live, name='live'),
+    url(r'^live/data/$', views.live_data, name='live_data'),
 ]
@@ -3,37 +3,67 @@ from datetime import timedelta
 
 from django.conf import settings
 from django.contrib.admin.views.decorators import staff_member_required
-from django.db.models import Count
+from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.db.models import Sum
+from django.http import JsonResponse
 from django.shortcuts import render
 from django.utils.timezone import now
 
 from frigg.builds.models import Build, Project
 
+from . import counters
+from .models import DailyBuildStats
+
 
 @staff_member_required
 def overview(request):
     graph_top = 0
     builds_per_day = {'labels': [], 'values': [], 'succeeded': []}
-    if 'psycopg2' in settings.DATABASES['default']['ENGINE']:
-        data = Build.objects.filter(start_time__gte=(now() - timedelta(weeks=30))) \
-                            .extra({"day": "date_trunc('day', start_time)"}) \
-                            .values("day").order_by("day").annotate(count=Count("id"))
+    data = DailyBuildStats.objects.filter(date__gte=(now() - timedelta(weeks=30)).date()) \
+                                  .values('date').order_by('date') \
+                                  .annotate(count=Sum('started'), succeeded=Sum('succeeded'))
+
+    for point in data:
+        graph_top = max([graph_top, point['count']])
+        builds_per_day['labels'].append(point['date'].day)
+        builds_per_day['values'].append(point['count'])
+        builds_per_day['succeeded'].append(point['succeeded'])
 
-        for point in data:
-            graph_top = max([graph_top, point['count']])
-            builds_per_day['labels'].append(point['day'].day)
-            builds_per_day['values'].append(point['count'])
+    totals = DailyBuildStats.objects.aggregate(
+        started=Sum('started'),
+        succeeded=Sum('succeeded'),
+        failed=Sum('failed')
+    )
 
-    pending_builds = Build.objects.filter(result=None)
+    paginator = Paginator(
+        Build.objects.filter(result=None).select_related('project').order_by('-id'),
+        settings.OVERVIEW_PAGINATION_COUNT
+    )
+    try:
+        pending_builds = paginator.page(request.GET.get('page'))
+    except PageNotAnInteger:
+        pending_builds = paginator.page(1)
+    except EmptyPage:
+        pending_builds = paginator.page(paginator.num_pages)
 
     return render(request, 'stats/overview.html', {
-        'number_of_builds': Build.objects.all().count(),
-        'number_of_success': Build.objects.filter(result__succeeded=True).count(),
-        'number_of_failure': Build.objects.filter(result__succeeded=False).count(),
-        'number_of_pending': len(pending_builds),
+        'number_of_builds': totals['started'] or 0,
+        'number_of_success': totals['succeeded'] or 0,
+        'number_of_failure': totals['failed'] or 0,
+        'number_of_pending': paginator.count,
         'approved_projects': Project.objects.filter(approved=True).count(),
         'unapproved_projects': Project.objects.filter(approved=False).count(),
         'builds_per_day': builds_per_day,
         'graph_top': graph_top,
         'pending_builds': pending_builds
     })
+
+
+@staff_member_required
+def live(request):
+    return render(request, 'stats/live.html')
+
+
+@staff_member_required
+def live_data(request):
+    return JsonResponse(counters.get_live_stats())
@@ -1,5 +1,6 @@
 import logging
 
+import requests
 from basis.compat import get_user_model
 
 from frigg.builds.models import Build, BuildResult, Project
@@ -117,6 +118,10 @@ class Event(object):
         except get_user_model().DoesNotExist:
             logger.debug('Could not load users for new project '
                          '{event.repository_owner}/{event.repository_name}.'.format(event=self))
+        except requests.RequestException as error:
+            logger.warning('Could not update members of {0}'.format(self.project), extra={
+                'error': error
+            })
 
     def create_project(self):
         project, created = Project.objects.get_or_create(
@@ -6,6 +6,7 @@ from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
 from django.views.generic.base import View
 
+from frigg.stats import counters
 from frigg.webhooks.events.github import GithubEvent
 
 
@@ -20,6 +21,7 @@ class WebhookView(View):
         return super(WebhookView, self).dispatch(request, *args, **kwargs)
 
     def post(self, request):
+        counters.webhook_received()
         event_type = self.get_event_type(request)
         if not event_type:
             return HttpResponse('Missing HTTP_X_GITHUB_EVENT')
@@ -1,16 +1,24 @@
 # -*- coding: utf-8 -*-
+import itertools
 import json
+from datetime import timedelta
 from decimal import Decimal
-from unittest import skip
+from unittest import mock, skip
 
 from django.contrib.auth import get_user_model
-from django.core.urlresolvers import reverse
+from django.core.urlresolvers import resolve, reverse
+from django.db import connection
 from django.test import RequestFactory, TestCase, override_settings
-from rest_framework.test import APIClient, APITestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils.timezone import now
+from rest_framework.test import APIClient, APITestCase, APITransactionTestCase
 
 from frigg.api.views import report_build, report_deployment
 from frigg.authentication.models import User
+from frigg.builds.managers import BUILD_SUMMARY_FIELDS
 from frigg.builds.models import Build, BuildResult, Project
+from frigg.builds.serializers import (BuildSummarySerializer, get_summary_columns,
+                                      serialize_build_summaries)
 from frigg.deployments.models import PRDeployment
 
 
@@ -23,13 +31,16 @@ class APITestMixin(object):
         self.assertEqual(obj['private'], project.private)
         self.assertEqual(obj['approved'], project.approved)
 
-    def assertBuild(self, obj, build_id):
+    def assertBuild(self, obj, build_id, summary=False):
         build = Build.objects.get(pk=build_id)
         self.assertEqual(obj['id'], build.pk)
         self.assertEqual(obj['sha'], build.sha)
         self.assertEqual(obj['branch'], build.branch)
         self.assertProject(obj['project'], build.project_id)
-        self.assertBuildResult(obj['result'], build.result.pk)
+        if summary:
+            self.assertBuildResultSummary(obj['result'], build.result.pk)
+        else:
+            self.assertBuildResult(obj['result'], build.result.pk)
 
     def assertBuildResult(self, obj, build_result_id):
         result = BuildResult.objects.get(pk=build_result_id)
@@ -41,6 +52,15 @@ class APITestMixin(object):
         self.assertEqual(obj['setup_tasks'], result.setup_tasks)
         self.assertEqual(obj['service_tasks'], result.service_tasks)
 
+    def assertBuildResultSummary(self, obj, build_result_id):
+        result = BuildResult.objects.get(pk=build_result_id)
+        self.assertEqual(obj['id'], result.id)
+        self.assertEqual(obj['coverage'], result.coverage)
+        self.assertEqual(obj['succeeded'], result.succeeded)
+        self.assertEqual(obj['task_count'], len(result.tasks))
+        self.assertNotIn('tasks', obj)
+        self.assertNotIn('setup_tasks', obj)
+
     def assertNotAllowed(self, method, url):
         response = getattr(self.client, method)(url)
         self.assertEqual(response.status_code, 403)
@@ -60,22 +80,36 @@ class ProjectAPITestCase(APITestCase, APITestMixin):
         response = self.client.get('/api/projects/')
         self.assertEqual(response.status_code, 200)
         json_response = response.json()
-        self.assertEqual(len(json_response), 2)
-        self.assertProject(json_response[0], 3)
-        self.assertProject(json_response[1], 4)
+        self.assertEqual(json_response['count'], 2)
+        self.assertProject(json_response['results'][0], 3)
+        self.assertProject(json_response['results'][1], 4)
 
     def test_get_projects_authenticated(self):
         self.client.force_authenticate(user=self.user)
         response = self.client.get('/api/projects/')
         self.assertEqual(response.status_code, 200)
         json_response = response.json()
-        self.assertEqual(len(json_response), 3)
-        self.assertProject(json_response[0], 1)
-        self.assertProject(json_response[1], 3)
-        self.assertProject(json_response[2], 4)
+        self.assertEqual(json_response['count'], 3)
+        self.assertProject(json_response['results'][0], 1)
+        self.assertProject(json_response['results'][1], 3)
+        self.assertProject(json_response['results'][2], 4)
         response = self.client.get('/api/projects/2/')
         self.assertEqual(response.status_code, 404)
 
+    @override_settings(FRIGG_API_PROJECT_BUILDS=1)
+    def test_get_projects_should_limit_builds(self):
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get('/api/projects/')
+        project = response.json()['results'][0]
+        self.assertEqual(len(project['builds']), 1)
+        self.assertEqual(project['builds'][0]['id'], 2)
+        self.assertEqual(project['builds'][0]['color'], 'green')
+        self.assertNotIn('tasks', project['builds'][0]['result'])
+
+    def test_get_projects_query_count(self):
+        with self.assertNumQueries(3):
+            self.client.get('/api/projects/')
+
     def test_get_project_anonymous(self):
         response = self.client.get('/api/projects/4/')
         self.assertEqual(response.status_code, 200)
@@ -120,20 +154,20 @@ class BuildAPITestCase(APITestCase, APITestMixin):
     def test_get_builds_anonymous(self):
         response = self.client.get('/api/builds/')
         json_response = response.json()
-        self.assertEqual(json_response['count'], 2)
-        self.assertBuild(json_response['results'][0], 5)
-        self.assertBuild(json_response['results'][1], 4)
+        self.assertEqual(len(json_response['results']), 2)
+        self.assertBuild(json_response['results'][0], 5, summary=True)
+        self.assertBuild(json_response['results'][1], 4, summary=True)
 
     def test_get_builds_authenticated(self):
         self.client.force_authenticate(user=self.user)
         response = self.client.get('/api/builds/')
         self.assertEqual(response.status_code, 200)
         json_response = response.json()
-        self.assertEqual(json_response['count'], 4)
-        self.assertBuild(json_response['results'][0], 5)
-        self.assertBuild(json_response['results'][1], 4)
-        self.assertBuild(json_response['results'][2], 2)
-        self.assertBuild(json_response['results'][3], 1)
+        self.assertEqual(len(json_response['results']), 4)
+        self.assertBuild(json_response['results'][0], 5, summary=True)
+        self.assertBuild(json_response['results'][1], 4, summary=True)
+        self.assertBuild(json_response['results'][2], 2, summary=True)
+        self.assertBuild(json_response['results'][3], 1, summary=True)
 
     def test_get_build_anonymous(self):
         response = self.client.get('/api/builds/5/')
@@ -183,7 +217,7 @@ class BuildAPITestCase(APITestCase, APITestMixin):
     def test_get_builds_by_owner_name(self):
         response = self.client.get('/api/builds/frigg/frigg-worker/')
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(len(response.json()), 1)
+        self.assertEqual(len(response.json()['results']), 1)
 
     def test_get_builds_by_owner_404(self):
         response = self.client.get('/api/builds/beaver/')
@@ -192,7 +226,462 @@ class BuildAPITestCase(APITestCase, APITestMixin):
     def test_get_builds_by_owner(self):
         response = self.client.get('/api/builds/frigg/')
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(len(response.json()), 2)
+        self.assertEqual(len(response.json()['results']), 2)
+
+    def test_fast_serialization_matches_serializer(self):
+        PRDeployment.objects.create(build_id=5, port=50000, succeeded=True, start_time=now(),
+                                    log='[{"task": "docker run", "succeeded": true}]')
+        BuildResult.objects.filter(pk=5).update(coverage=Decimal('92.5'), result_log=[
+            {'task': 'tox', 'succeeded': False, 'log': 'failed'},
+        ])
+        Build.objects.filter(pk=5).update(start_time=now(), message='Fix tests\n\nBody',
+                                          pull_request_id=2)
+        BuildResult.objects.filter(pk=4).delete()
+        builds = Build.objects.filter(project__owner='frigg')
+
+        self.assertEqual(
+            serialize_build_summaries(builds.summary_values()),
+            BuildSummarySerializer(builds.with_result_summary(), many=True).data
+        )
+
+    def test_get_builds_summary(self):
+        BuildResult.objects.filter(pk=5).update(result_log=[
+            {'task': 'flake8', 'succeeded': True, 'log': 'ok'},
+            {'task': 'tox', 'succeeded': False, 'log': 'failed'},
+        ])
+        response = self.client.get('/api/builds/frigg/frigg-worker/')
+        result = response.json()['results'][0]['result']
+        self.assertEqual(result['task_count'], 2)
+        self.assertEqual(result['failing_tasks'], ['tox'])
+        self.assertNotIn('tasks', result)
+
+    @mock.patch('frigg.api.pagination.BuildCursorPagination.page_size', 1)
+    def test_get_builds_cursor(self):
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get('/api/builds/')
+        json_response = response.json()
+        self.assertIsNone(json_response['previous'])
+        self.assertBuild(json_response['results'][0], 5, summary=True)
+
+        response = self.client.get(json_response['next'])
+        json_response = response.json()
+        self.assertEqual([build['id'] for build in json_response['results']], [4])
+
+        response = self.client.get(json_response['previous'])
+        json_response = response.json()
+        self.assertEqual([build['id'] for build in json_response['results']], [5])
+
+    @mock.patch('frigg.api.pagination.BuildCursorPagination.page_size', 1)
+    def test_get_builds_by_owner_cursor(self):
+        response = self.client.get('/api/builds/frigg/')
+        json_response = response.json()
+        self.assertEqual([build['id'] for build in json_response['results']], [5])
+
+        response = self.client.get(json_response['next'])
+        self.assertEqual(response.status_code, 200)
+        json_response = response.json()
+        self.assertEqual([build['id'] for build in json_response['results']], [4])
+        self.assertIsNone(json_response['next'])
+
+
+class AnonymousCacheAPITestCase(APITestCase):
+    fixtures = ['frigg/builds/fixtures/users.json', 'frigg/api/fixtures/test_views.yaml']
+
+    def test_anonymous_response_is_cached(self):
+        response = self.client.get('/api/builds/frigg/frigg-worker/')
+        self.assertEqual(response.json()['results'][0]['result']['worker_host'], None)
+
+        BuildResult.objects.filter(build_id=5).update(worker_host='ron')
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/builds/frigg/frigg-worker/')
+        self.assertEqual(response.json()['results'][0]['result']['worker_host'], None)
+
+        Project.bump_cache_version(4)
+        response = self.client.get('/api/builds/frigg/frigg-worker/')
+        self.assertEqual(response.json()['results'][0]['result']['worker_host'], 'ron')
+
+    def test_listing_uses_all_projects_version(self):
+        self.client.get('/api/builds/')
+        with self.assertNumQueries(0):
+            self.client.get('/api/builds/')
+
+        BuildResult.objects.filter(build_id=5).update(worker_host='ron')
+        Project.bump_cache_version(3)
+        response = self.client.get('/api/builds/')
+        self.assertEqual(response.json()['results'][0]['result']['worker_host'], 'ron')
+
+    def test_authenticated_response_is_not_cached(self):
+        self.client.get('/api/builds/5/')
+        self.client.force_authenticate(user=get_user_model().objects.get(pk=1))
+        response = self.client.get('/api/builds/1/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['id'], 1)
+
+        BuildResult.objects.filter(build_id=5).update(worker_host='ron')
+        response = self.client.get('/api/builds/5/')
+        self.assertEqual(response.json()['result']['worker_host'], 'ron')
+
+    def test_not_found_is_not_cached(self):
+        self.assertEqual(self.client.get('/api/builds/1/').status_code, 404)
+        Project.objects.filter(pk=1).update(private=False)
+        self.assertEqual(self.client.get('/api/builds/1/').status_code, 200)
+
+    def test_partial_build_page_is_cached(self):
+        url = '/api/partials/build/frigg/frigg-worker/1/'
+        self.assertEqual(self.client.get(url).status_code, 200)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_partial_build_page_of_private_project(self):
+        url = '/api/partials/build/frigg/frigg.github.io/1/'
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.client.force_login(get_user_model().objects.get(pk=1))
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+
+class ConditionalGetAPITestCase(APITestCase):
+    fixtures = ['frigg/builds/fixtures/users.json', 'frigg/api/fixtures/test_views.yaml']
+
+    def test_build_etag(self):
+        response = self.client.get('/api/builds/frigg/frigg-worker/1/')
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/builds/frigg/frigg-worker/1/',
+                                       HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        BuildResult.objects.get(build_id=5).save()
+        response = self.client.get('/api/builds/frigg/frigg-worker/1/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_build_last_modified(self):
+        response = self.client.get('/api/builds/5/')
+        last_modified = response['Last-Modified']
+
+        response = self.client.get('/api/builds/5/', HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+        Build.objects.filter(pk=5).update(updated_at=now() + timedelta(minutes=1))
+        response = self.client.get('/api/builds/5/', HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 200)
+
+    def test_build_not_permitted(self):
+        response = self.client.get('/api/builds/1/', HTTP_IF_NONE_MATCH='"*"')
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.has_header('ETag'))
+
+    def test_listing_etag(self):
+        response = self.client.get('/api/builds/frigg/frigg-worker/')
+        etag = response['ETag']
+
+        response = self.client.get('/api/builds/frigg/frigg-worker/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        Project.bump_cache_version(4)
+        response = self.client.get('/api/builds/frigg/frigg-worker/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_listing_etag_depends_on_user(self):
+        etag = self.client.get('/api/projects/')['ETag']
+        self.client.force_authenticate(user=get_user_model().objects.get(pk=1))
+        response = self.client.get('/api/projects/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_listing_etag_depends_on_memberships(self):
+        user = get_user_model().objects.get(pk=1)
+        self.client.force_authenticate(user=user)
+        etag = self.client.get('/api/projects/')['ETag']
+        response = self.client.get('/api/projects/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        Project.objects.get(pk=2).members.add(user)
+        response = self.client.get('/api/projects/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], 4)
+
+    def test_build_etag_depends_on_deployment(self):
+        self.client.force_authenticate(user=get_user_model().objects.get(pk=1))
+        deployment = PRDeployment.objects.create(build_id=5, port=8000, succeeded=True,
+                                                 start_time=now())
+        response = self.client.get('/api/builds/5/')
+        self.assertFalse(response.has_header('Last-Modified'))
+        etag = response['ETag']
+        response = self.client.get('/api/builds/5/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        deployment.port = 8001
+        deployment.save()
+        response = self.client.get('/api/builds/5/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        PRDeployment.objects.filter(pk=deployment.pk).update(
+            start_time=now() - timedelta(days=2)
+        )
+        response = self.client.get('/api/builds/5/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.json()['deployment']['is_alive'])
+
+    def test_project_etag(self):
+        etag = self.client.get('/api/projects/4/')['ETag']
+        response = self.client.get('/api/projects/4/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        Project.objects.get(pk=4).save()
+        response = self.client.get('/api/projects/4/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+
+class ChangesAPITestCase(APITransactionTestCase):
+    fixtures = ['frigg/builds/fixtures/users.json', 'frigg/api/fixtures/test_views.yaml']
+
+    def get_changes(self, cursor, **params):
+        response = self.client.get('/api/changes/', dict(params, cursor=cursor))
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        return data['cursor'], [build['id'] for build in data['builds']]
+
+    def test_changes(self):
+        cursor = self.client.get('/api/changes/').json()['cursor']
+        self.assertEqual(self.get_changes(cursor)[1], [])
+
+        build = Build.objects.create(project_id=4, build_number=2, sha='a', message='')
+        cursor, builds = self.get_changes(cursor)
+        self.assertEqual(builds, [build.pk])
+        self.assertEqual(self.get_changes(cursor)[1], [])
+
+        BuildResult.objects.filter(build_id=5).update(succeeded=False)
+        PRDeployment.objects.create(build_id=build.pk, port=50000)
+        cursor, builds = self.get_changes(cursor)
+        self.assertEqual(builds, [5, build.pk])
+
+    def test_changes_permitted(self):
+        cursor = self.client.get('/api/changes/').json()['cursor']
+        BuildResult.objects.filter(build_id__in=[1, 5]).update(succeeded=False)
+        self.assertEqual(self.get_changes(cursor)[1], [5])
+
+        self.client.force_authenticate(user=get_user_model().objects.get(pk=1))
+        self.assertEqual(self.get_changes(cursor)[1], [1, 5])
+
+    @override_settings(FRIGG_CHANGES_LIMIT=1)
+    def test_changes_limit(self):
+        cursor = self.client.get('/api/changes/').json()['cursor']
+        BuildResult.objects.filter(build_id=4).update(succeeded=False)
+        BuildResult.objects.filter(build_id=5).update(succeeded=False)
+
+        cursor, builds = self.get_changes(cursor)
+        self.assertEqual(builds, [4])
+        cursor, builds = self.get_changes(cursor)
+        self.assertEqual(builds, [5])
+
+        BuildResult.objects.filter(build_id__in=[4, 5]).update(succeeded=True)
+        self.assertEqual(self.get_changes(cursor)[1], [4, 5])
+
+    def test_changes_long_polling(self):
+        cursor = self.client.get('/api/changes/').json()['cursor']
+
+        def change(seconds):
+            BuildResult.objects.filter(build_id=5).update(succeeded=False)
+            Project.bump_cache_version(4)
+
+        with mock.patch('frigg.api.changes.time.sleep', side_effect=change) as mock_sleep:
+            cursor, builds = self.get_changes(cursor, timeout=10)
+        self.assertEqual(builds, [5])
+        self.assertEqual(mock_sleep.call_count, 1)
+
+    def test_changes_timeout(self):
+        cursor = self.client.get('/api/changes/').json()['cursor']
+        with mock.patch('frigg.api.changes.time.sleep') as mock_sleep:
+            with mock.patch('frigg.api.changes.time.time', side_effect=itertools.count()):
+                self.assertEqual(self.get_changes(cursor, timeout=2)[1], [])
+        self.assertTrue(mock_sleep.called)
+
+    def test_changes_invalid_cursor(self):
+        response = self.client.get('/api/changes/', {'cursor': 'nope'})
+        self.assertEqual(response.status_code, 400)
+
+
+class SparseFieldsetsAPITestCase(APITestCase):
+    fixtures = ['frigg/builds/fixtures/users.json', 'frigg/api/fixtures/test_views.yaml']
+
+    def get(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.json(), ' '.join(query['sql'] for query in context.captured_queries)
+
+    def test_build_list_fields(self):
+        data, sql = self.get('/api/builds/?fields=id,build_number')
+        self.assertEqual(set(data['results'][0]), {'id', 'build_number'})
+        self.assertNotIn('builds_buildresult', sql)
+        self.assertNotIn('deployments_prdeployment', sql)
+
+        data, sql = self.get('/api/builds/?fields=id,color')
+        self.assertEqual(data['results'][0], {'id': 5, 'color': 'green'})
+        self.assertIn('builds_buildresult', sql)
+        self.assertNotIn('deployments_prdeployment', sql)
+
+    def test_build_fields_expand(self):
+        data, sql = self.get('/api/builds/5/?fields=id&expand=result')
+        self.assertEqual(set(data), {'id', 'result'})
+        self.assertNotIn('deployments_prdeployment', sql)
+
+    def test_builds_by_owner_fields(self):
+        data, sql = self.get('/api/builds/frigg/frigg-worker/?fields=id,commit_url')
+        self.assertEqual(data['results'], [{
+            'id': 5,
+            'commit_url': 'https://github.com/frigg/frigg-worker/commit/fjkds/'
+        }])
+        self.assertNotIn('builds_buildresult', sql)
+        self.assertNotIn('deployments_prdeployment', sql)
+
+    def test_project_fields(self):
+        data, sql = self.get('/api/projects/?fields=id,name')
+        self.assertEqual(set(data['results'][0]), {'id', 'name'})
+        self.assertNotIn('builds_build', sql)
+
+        data, sql = self.get('/api/projects/4/?fields=id&expand=builds')
+        self.assertEqual(set(data), {'id', 'builds'})
+        self.assertEqual(len(data['builds']), 1)
+
+    def test_summary_columns(self):
+        self.assertEqual(get_summary_columns(), sorted(BUILD_SUMMARY_FIELDS))
+        self.assertEqual(get_summary_columns(['id', 'sha']), ['id', 'sha'])
+
+
+class BuildLookupAPITestCase(APITestCase, APITestMixin):
+    fixtures = ['frigg/builds/fixtures/users.json', 'frigg/api/fixtures/test_views.yaml']
+
+    def lookup(self, data):
+        return self.client.post('/api/lookup/builds/', data, format='json')
+
+    def test_lookup(self):
+        with self.assertNumQueries(1):
+            response = self.lookup({
+                'ids': [1, 4, 5, 99],
+                'commits': [
+                    {'owner': 'frigg', 'name': 'frigg-worker', 'sha': 'fjkds'},
+                    {'owner': 'frigg', 'name': 'frigg', 'sha': '1kjfkjsdf'},
+                    {'owner': 'frigg', 'name': 'frigg-worker', 'sha': 'unknown'},
+                ]
+            })
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(set(data['ids']), {'1', '4', '5', '99'})
+        self.assertIsNone(data['ids']['1'])
+        self.assertIsNone(data['ids']['99'])
+        self.assertBuild(data['ids']['4'], 4, summary=True)
+        self.assertBuild(data['ids']['5'], 5, summary=True)
+        self.assertEqual(data['commits']['frigg/frigg-worker/fjkds']['id'], 5)
+        self.assertIsNone(data['commits']['frigg/frigg/1kjfkjsdf'])
+        self.assertIsNone(data['commits']['frigg/frigg-worker/unknown'])
+
+    def test_lookup_private_builds(self):
+        self.client.force_authenticate(user=get_user_model().objects.get(pk=1))
+        response = self.lookup({
+            'ids': [1, 3],
+            'commits': [{'owner': 'frigg', 'name': 'frigg', 'sha': '1kjfkjsdf'}]
+        })
+        data = response.json()
+        self.assertEqual(data['ids']['1']['id'], 1)
+        self.assertIsNone(data['ids']['3'])
+        self.assertEqual(data['commits']['frigg/frigg/1kjfkjsdf']['id'], 1)
+
+    def test_lookup_newest_build_of_commit(self):
+        Build.objects.create(project_id=4, build_number=2, branch='master', sha='fjkds')
+        response = self.lookup({
+            'commits': [{'owner': 'frigg', 'name': 'frigg-worker', 'sha': 'fjkds'}]
+        })
+        self.assertEqual(response.json()['commits']['frigg/frigg-worker/fjkds']['build_number'], 2)
+
+    def test_lookup_empty(self):
+        with self.assertNumQueries(0):
+            response = self.lookup({})
+        self.assertEqual(response.json(), {'ids': {}, 'commits': {}})
+
+    @override_settings(FRIGG_API_LOOKUP_LIMIT=2)
+    def test_lookup_limit(self):
+        response = self.lookup({
+            'ids': [4, 5],
+            'commits': [{'owner': 'frigg', 'name': 'frigg-worker', 'sha': 'fjkds'}]
+        })
+        self.assertEqual(response.status_code, 400)
+
+    def test_lookup_invalid(self):
+        self.assertEqual(self.lookup({'ids': ['a']}).status_code, 400)
+        self.assertEqual(self.lookup({'ids': 5}).status_code, 400)
+        self.assertEqual(self.lookup({'commits': [{'owner': 'frigg'}]}).status_code, 400)
+        self.assertEqual(self.lookup({'commits': ['frigg/frigg']}).status_code, 400)
+        self.assertEqual(self.lookup([1, 2]).status_code, 400)
+        self.assertEqual(self.lookup({'ids': [2 ** 63]}).status_code, 400)
+        self.assertEqual(self.lookup({'ids': [0]}).status_code, 400)
+        self.assertEqual(self.lookup(5).status_code, 400)
+
+    def test_lookup_does_not_shadow_owner(self):
+        self.assertEqual(resolve('/api/builds/lookup/').url_name, 'builds_by_owner')
+
+
+class BuildLogAPITestCase(APITestCase):
+    fixtures = ['frigg/builds/fixtures/users.json', 'frigg/api/fixtures/test_views.yaml']
+
+    def setUp(self):
+        BuildResult.objects.filter(pk=5).update(
+            result_log=[
+                {'task': 'flake8', 'succeeded': True, 'return_code': 0, 'log': 'ok'},
+                {'task': 'tox', 'succeeded': False, 'return_code': 1, 'log': 'a\nb\nc\nd'},
+            ],
+            setup_log=[{'task': 'pip install', 'succeeded': True, 'log': 'installed'}]
+        )
+
+    def test_get_log_index(self):
+        response = self.client.get('/api/builds/5/log/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), [
+            {'task': 'flake8', 'succeeded': True, 'return_code': 0},
+            {'task': 'tox', 'succeeded': False, 'return_code': 1},
+        ])
+
+    def test_get_log_task(self):
+        response = self.client.get('/api/builds/5/log/?task=1&start=1&end=3')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {
+            'task': 'tox',
+            'succeeded': False,
+            'return_code': 1,
+            'index': 1,
+            'line_count': 4,
+            'start': 1,
+            'lines': ['b', 'c'],
+        })
+
+    def test_get_log_other_log(self):
+        response = self.client.get('/api/builds/5/log/?log=setup_tasks&task=0')
+        self.assertEqual(response.json()['lines'], ['installed'])
+
+    def test_get_archived_log(self):
+        Build.objects.get(pk=5).delete_logs()
+        self.assertEqual(self.client.get('/api/builds/5/log/').json(), [
+            {'task': 'flake8', 'succeeded': True, 'return_code': 0},
+            {'task': 'tox', 'succeeded': False, 'return_code': 1},
+        ])
+        response = self.client.get('/api/builds/5/log/?task=1&start=3')
+        self.assertEqual(response.json()['lines'], ['d'])
+        self.assertEqual(self.client.get('/api/builds/5/log/?task=2').status_code, 404)
+
+    def test_get_log_invalid(self):
+        self.assertEqual(self.client.get('/api/builds/5/log/?log=secrets').status_code, 400)
+        self.assertEqual(self.client.get('/api/builds/5/log/?task=first').status_code, 400)
+        self.assertEqual(self.client.get('/api/builds/5/log/?task=-1').status_code, 400)
+        Build.objects.get(pk=5).delete_logs()
+        self.assertEqual(self.client.get('/api/builds/5/log/?task=-1').status_code, 400)
+
+    def test_get_log_404(self):
+        self.assertEqual(self.client.get('/api/builds/5/log/?task=2').status_code, 404)
+        self.assertEqual(self.client.get('/api/builds/1/log/').status_code, 404)
+        self.assertEqual(self.client.get('/api/builds/300/log/').status_code, 404)
 
 
 class UserAPITests(TestCase):
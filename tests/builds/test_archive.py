@@ -0,0 +1,29 @@
+import gzip
+import os
+
+from frigg.builds.archive import get_path, read_logs, write_logs
+
+
+def test_write_logs(settings):
+    logs = {'result_log': [{'task': 'tox', 'log': 'ok'}], 'setup_log': None}
+    digest, size = write_logs(logs)
+    path = get_path(digest)
+    assert path.startswith(settings.FRIGG_LOG_ARCHIVE_DIRECTORY)
+    assert os.path.getsize(path) == size
+    with gzip.open(path) as f:
+        assert b'"tox"' in f.read()
+
+    assert read_logs(digest) == {
+        'result_log': [{'task': 'tox', 'log': 'ok'}],
+        'setup_log': [],
+        'service_log': [],
+        'after_log': [],
+    }
+
+
+def test_write_logs_is_content_addressed():
+    first, size = write_logs({'result_log': [{'task': 'tox'}]})
+    os.utime(get_path(first), (0, 0))
+    assert write_logs({'result_log': [{'task': 'tox'}], 'after_log': []})[0] == first
+    assert os.path.getmtime(get_path(first)) == 0
+    assert write_logs({'result_log': [{'task': 'flake8'}]})[0] != first
@@ -1,7 +1,14 @@
+import csv
+import json
+from datetime import timedelta
+
 import pytest
-from django.core.management import call_command
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.utils.timezone import now
 
-from frigg.builds.models import Build, Project
+from frigg.builds.models import (BranchStatus, Build, BuildResult, LogArchive, LogRetentionRun,
+                                 Project)
 
 
 @pytest.fixture
@@ -26,3 +33,145 @@ def test_restart_should_call_start_when_force_is_true(mocker, build):
     call_command('restart_builds', force=True)
     assert mock_start.called
     assert not mock_restart.called
+
+
+@pytest.mark.django_db
+def test_update_branch_statuses(build):
+    BuildResult.objects.create(build=build, succeeded=True, coverage=90)
+    pending = Build.objects.create(project=build.project, branch='master', build_number=2)
+    pull_request = Build.objects.create(project=build.project, branch='master', build_number=3,
+                                        pull_request_id=1)
+    BuildResult.objects.create(build=pull_request, succeeded=False)
+    BranchStatus.objects.create(project=build.project, branch='master', duration_average=50,
+                                duration_p50=45, duration_p90=60, duration_histogram=[1])
+    call_command('update_branch_statuses')
+    status = BranchStatus.objects.get(project=build.project, branch='master')
+    assert status.build_id == build.pk
+    assert status.build_id != pending.pk
+    assert status.succeeded
+    assert status.coverage == 90
+    assert status.duration_average == 50
+    assert status.duration_histogram == [1]
+
+
+@pytest.mark.django_db
+def test_benchmark_build_serializers(capsys):
+    call_command('benchmark_build_serializers', builds=[3], repeat=1)
+    out, err = capsys.readouterr()
+    assert out.startswith('3 builds: serializer ')
+    assert not Project.objects.filter(name__startswith='benchmark').exists()
+
+
+@pytest.mark.django_db
+def test_export_builds(build, capsys):
+    build.start_time = now() - timedelta(minutes=2)
+    build.end_time = build.start_time + timedelta(seconds=90)
+    build.save()
+    BuildResult.objects.create(build=build, succeeded=True, coverage=90, worker_host='ron')
+    Build.objects.create(project=build.project, branch='feature', build_number=2,
+                         pull_request_id=3, sha='sha')
+
+    call_command('export_builds', 'tind/frigg')
+    out, err = capsys.readouterr()
+    rows = [json.loads(line) for line in out.splitlines()]
+    assert len(rows) == 2
+    assert rows[0]['build_number'] == 1
+    assert rows[0]['duration'] == 90
+    assert rows[0]['succeeded'] is True
+    assert rows[0]['coverage'] == 90
+    assert rows[0]['worker_host'] == 'ron'
+    assert rows[0]['pull_request_id'] is None
+    assert rows[1] == {
+        'build_number': 2, 'branch': 'feature', 'sha': 'sha', 'pull_request_id': 3,
+        'start_time': None, 'end_time': None, 'duration': None, 'succeeded': None,
+        'coverage': None, 'worker_host': None,
+    }
+
+
+@pytest.mark.django_db
+def test_export_builds_csv(build, tmpdir):
+    path = str(tmpdir.join('builds.csv'))
+    call_command('export_builds', 'tind/frigg', format='csv', output=path)
+    with open(path) as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == 1
+    assert rows[0]['build_number'] == '1'
+    assert rows[0]['branch'] == 'master'
+
+
+@pytest.mark.django_db
+def test_export_builds_unknown_project():
+    with pytest.raises(CommandError):
+        call_command('export_builds', 'tind/unknown')
+
+
+def create_finished_builds(project, count, end_time):
+    builds = []
+    for number in range(count):
+        build = Build.objects.create(project=project, branch='master', build_number=number + 1,
+                                     end_time=end_time)
+        BuildResult.objects.create(build=build, result_log=[{'task': 'tox', 'log': 'x' * 100}],
+                                   setup_log=[{'task': 'make', 'log': 'y' * 100}])
+        builds.append(build)
+    return builds
+
+
+def cleared_build_ids():
+    return set(BuildResult.objects.filter(result_log=[], setup_log=[])
+                                  .values_list('build_id', flat=True))
+
+
+@pytest.mark.django_db
+def test_delete_logs_for_all_builds(capsys):
+    old = now() - timedelta(days=60)
+    builds = create_finished_builds(Project.objects.create(owner='tind', name='frigg'), 8, old)
+    other = create_finished_builds(Project.objects.create(owner='tind', name='other'), 2, old)
+    recent = builds[0].project.builds.create(build_number=9, end_time=now())
+    BuildResult.objects.create(build=recent, result_log=[{'task': 'tox', 'log': 'x'}])
+
+    call_command('delete_logs_for_all_builds', chunk_size=2)
+    out, err = capsys.readouterr()
+    assert cleared_build_ids() == {build.pk for build in builds[:4]}
+    assert not cleared_build_ids() & {build.pk for build in other}
+    assert set(LogArchive.objects.values_list('result__build_id', flat=True)) == \
+        cleared_build_ids()
+    assert BuildResult.objects.get(build=builds[0]).tasks == [{'task': 'tox', 'log': 'x' * 100}]
+    assert Build.objects.with_result_summary().get(pk=builds[0].pk).task_count == 1
+    assert BuildResult.objects.get(build=builds[0]).log_summary == {
+        'first_task': 'tox', 'task_count': 1, 'failing_tasks': [],
+    }
+    assert out.startswith('Archived logs for 4 builds, reclaimed ')
+    assert int(out.split()[-2]) > 4 * 200
+
+    call_command('delete_logs_for_all_builds')
+    out, err = capsys.readouterr()
+    assert out.strip() == 'Archived logs for 0 builds, reclaimed 0 bytes'
+
+
+@pytest.mark.django_db
+def test_delete_logs_for_all_builds_continues_from_last_run(capsys, mocker):
+    old = now() - timedelta(days=60)
+    project = Project.objects.create(owner='tind', name='frigg')
+    builds = create_finished_builds(project, 5, old)
+    call_command('delete_logs_for_all_builds')
+    assert cleared_build_ids() == set()
+
+    newer = create_finished_builds(project, 2, old)
+    call_command('delete_logs_for_all_builds')
+    assert cleared_build_ids() == {build.pk for build in builds[:2]}
+
+    Build.objects.filter(pk=newer[0].pk).update(end_time=None)
+    create_finished_builds(project, 4, old)
+    call_command('delete_logs_for_all_builds')
+    assert cleared_build_ids() == {build.pk for build in builds}
+    assert LogRetentionRun.objects.count() == 3
+
+    Build.objects.filter(pk=newer[0].pk).update(end_time=now())
+    call_command('delete_logs_for_all_builds')
+    assert cleared_build_ids() == {build.pk for build in builds}
+
+    later = now() + timedelta(hours=settings.FRIGG_KEEP_BUILD_LOGS_TIMEDELTA + 1)
+    mocker.patch('frigg.builds.management.commands.delete_logs_for_all_builds.now',
+                 return_value=later)
+    call_command('delete_logs_for_all_builds')
+    assert cleared_build_ids() == {build.pk for build in builds} | {newer[0].pk}
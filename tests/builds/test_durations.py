@@ -0,0 +1,39 @@
+from frigg.builds.durations import BUCKETS, add_duration, get_bucket, get_percentile
+
+
+def test_get_bucket():
+    assert get_bucket(0) == 0
+    assert get_bucket(10) == 1
+    assert get_bucket(100) == BUCKETS.index(116)
+    assert get_bucket(10 ** 6) == len(BUCKETS)
+
+
+def test_get_percentile():
+    assert get_percentile([], 0.5) is None
+    histogram = [0] * (len(BUCKETS) + 1)
+    histogram[1] = 1
+    assert get_percentile(histogram, 0.5) == 11
+    histogram[-1] = 1
+    assert get_percentile(histogram, 0.9) == BUCKETS[-1]
+
+
+def test_add_duration():
+    stats = {}
+    for seconds in [100] * 10:
+        stats = add_duration(stats, seconds)
+    assert stats['duration_average'] == 100
+    assert 93 <= stats['duration_p50'] <= 116
+    assert 93 <= stats['duration_p90'] <= 116
+
+    stats = add_duration(stats, 1000)
+    assert stats['duration_average'] == 280
+    assert 93 <= stats['duration_p50'] <= 116
+    assert 867 <= stats['duration_p90'] <= 1084
+
+
+def test_add_duration_forgets_old_builds():
+    stats = {}
+    for seconds in [100] * 10 + [1000] * 30:
+        stats = add_duration(stats, seconds)
+    assert 867 <= stats['duration_p50'] <= 1084
+    assert 990 < stats['duration_average'] < 1000
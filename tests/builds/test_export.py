@@ -0,0 +1,15 @@
+import pytest
+
+from frigg.builds.export import get_export_rows
+from frigg.builds.models import Build, Project
+
+
+@pytest.mark.django_db
+def test_get_export_rows_in_chunks():
+    project = Project.objects.create(owner='tind', name='frigg')
+    for number in range(5):
+        Build.objects.create(project=project, build_number=number + 1)
+    Build.objects.create(project=Project.objects.create(owner='tind', name='other'))
+
+    rows = list(get_export_rows(project, chunk_size=2))
+    assert [row['build_number'] for row in rows] == [1, 2, 3, 4, 5]
@@ -0,0 +1,60 @@
+from datetime import timedelta
+
+from django.db import connection
+from django.test import TestCase
+from django.utils.timezone import now
+
+from frigg.builds.models import Build, Project
+
+
+class BuildIndexesTestCase(TestCase):
+    """
+    Checks that the hot queries on builds can use the indexes from migration 0037. Sequential
+    scans are disabled since the planner would prefer them for a table of this size.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        start = now() - timedelta(days=100)
+        builds = []
+        for project_number in range(20):
+            project = Project.objects.create(owner='frigg', name='project-{0}'.format(
+                project_number
+            ))
+            for number in range(100):
+                builds.append(Build(
+                    project=project,
+                    build_number=number + 1,
+                    branch=['master', 'develop', 'feature'][number % 3],
+                    pull_request_id=number if number % 4 == 0 else 0,
+                    sha=str(number),
+                    start_time=start + timedelta(hours=number),
+                    end_time=start + timedelta(hours=number, minutes=5) if number < 98 else None,
+                ))
+        Build.objects.bulk_create(builds)
+        cls.project = project
+
+    def explain(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE builds_build')
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute('EXPLAIN ' + sql, params)
+            return '\n'.join(row[0] for row in cursor.fetchall())
+
+    def test_branch_builds(self):
+        builds = Build.objects.filter(project=self.project, branch='feature', pull_request_id=0)
+        self.assertIn('builds_build_branch_idx', self.explain(builds.values('id')))
+
+    def test_master_builds_ended_before(self):
+        builds = self.project.builds.filter(branch='master',
+                                            end_time__lt=now() - timedelta(days=97))
+        self.assertIn('builds_build_master_end_time_idx', self.explain(builds.values('id')))
+
+    def test_builds_ended_before(self):
+        builds = Build.objects.filter(end_time__lt=now() - timedelta(days=99))
+        self.assertIn('builds_build_end_time_idx', self.explain(builds.values('id')))
+
+    def test_unfinished_builds(self):
+        builds = Build.objects.filter(end_time=None, result=None)
+        self.assertIn('builds_build_unfinished_idx', self.explain(builds.values('id')))
@@ -0,0 +1,30 @@
+from frigg.builds.log_limits import get_task_limits, limit_logs, truncate_log
+
+
+def test_truncate_log():
+    assert truncate_log('short', 10) == 'short'
+    assert truncate_log('abcdefghij', 4) == 'ab\n\n[... 6 of 10 bytes truncated ...]\n\nij'
+    assert truncate_log('abcdefghij', 5) == 'ab\n\n[... 5 of 10 bytes truncated ...]\n\nhij'
+
+
+def test_truncate_log_multibyte():
+    log = truncate_log('æøå' * 4, 5)
+    assert log.startswith('æ\n\n[... 19 of 24 bytes truncated ...]')
+    assert log.endswith('å')
+
+
+def test_get_task_limits():
+    assert get_task_limits([5, 50, 500], 100, 1000) == [5, 50, 100]
+    assert get_task_limits([5, 50, 500], 100, 90) == [5, 42, 43]
+    assert get_task_limits([], 100, 90) == []
+
+
+def test_limit_logs():
+    results = [{'task': 'tox', 'log': 'x' * 30}, {'task': 'flake8'}]
+    setup = [{'task': 'make', 'log': 'y' * 5}]
+    assert limit_logs([results, setup, []], 10, 100) == 1
+    assert results[0]['truncated']
+    assert results[0]['log_size'] == 30
+    assert results[1] == {'task': 'flake8'}
+    assert setup == [{'task': 'make', 'log': 'y' * 5}]
+    assert limit_logs([results, setup], 100, 100) == 0
@@ -1,5 +1,6 @@
 # -*- coding: utf8 -*-
 import json
+import os
 from datetime import datetime, timedelta
 from unittest import mock
 
@@ -7,12 +8,15 @@ import redis
 import responses
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.utils.timezone import get_current_timezone, now
 from mockredis import mock_redis_client
 
 from frigg.authentication.models import User
-from frigg.builds.models import Build, BuildResult, Project
+from frigg.builds.archive import get_path
+from frigg.builds.models import BranchStatus, Build, BuildResult, Project
 
 r = redis.Redis(**settings.REDIS_SETTINGS)
 
@@ -44,6 +48,16 @@ class ProjectTestCase(TestCase):
         Build.objects.create(project=project, build_number=42)
         self.assertEqual(project.last_build_number, 42)
 
+    def test_cache_version(self):
+        project = Project.objects.create(owner='frigg', name='frigg')
+        version = Project.get_cache_version(project.pk)
+        all_version = Project.get_cache_version()
+        self.assertEqual(Project.get_cache_version(project.pk), version)
+
+        project.save()
+        self.assertEqual(Project.get_cache_version(project.pk), version + 1)
+        self.assertEqual(Project.get_cache_version(), all_version + 1)
+
     def test_auto_approval(self):
         project = Project.objects.create(owner='frigg', name='frigg')
         self.assertTrue(project.approved)
@@ -54,6 +68,39 @@ class ProjectTestCase(TestCase):
         project.update_members()
         self.assertEqual(project.members.all().count(), 1)
 
+    def test_add_memberships_should_skip_existing_memberships(self):
+        user = User.objects.get(username='dumbledore')
+        worker = Project.objects.create(owner='frigg', name='frigg-worker')
+        hq = Project.objects.create(owner='frigg', name='frigg-hq')
+        worker.members.add(user)
+
+        Project.add_memberships([(worker.pk, user.pk), (hq.pk, user.pk)])
+        self.assertEqual(set(user.projects.all()), {worker, hq})
+
+    @mock.patch('frigg.helpers.github.list_collaborators')
+    def test_sync_members(self, mock_list_collaborators):
+        dumbledore = User.objects.get(username='dumbledore')
+        harry = User.objects.create(username='harry')
+        worker = Project.objects.create(owner='frigg', name='frigg-worker')
+        hq = Project.objects.create(owner='frigg', name='frigg-hq')
+        worker.members.add(harry)
+        hq.members.add(harry)
+        mock_list_collaborators.side_effect = lambda project: {
+            'frigg-worker': ['dumbledore', 'harry', 'unknown'],
+            'frigg-hq': ['dumbledore'],
+        }[project.name]
+
+        with CaptureQueriesContext(connection) as single:
+            Project.sync_members([hq])
+        hq.members.add(harry)
+        hq.members.remove(dumbledore)
+        with CaptureQueriesContext(connection) as both:
+            Project.sync_members([worker, hq])
+
+        self.assertEqual(len(both), len(single))
+        self.assertEqual(set(worker.members.all()), {dumbledore, harry})
+        self.assertEqual(set(hq.members.all()), {dumbledore})
+
     def test_start(self):
         project = Project.objects.create(owner='frigg', name='frigg')
         build = project.start_build({
@@ -96,15 +143,32 @@ class ProjectTestCase(TestCase):
 
     def test_average_time(self):
         project = Project.objects.create(owner='frigg', name='frigg-worker', private=False)
+        self.assertIsNone(project.average_time)
         build_options = dict(project=project, build_number=1,
                              start_time=datetime(2015, 5, 5, 5, 5, tzinfo=get_current_timezone()),
                              end_time=datetime(2015, 5, 5, 5, 15, tzinfo=get_current_timezone()))
-        builds = [Build.objects.create(**build_options)]
+        Build.objects.create(**build_options).record_duration()
         build_options = dict(project=project, build_number=2,
                              start_time=datetime(2015, 5, 5, 5, 5, tzinfo=get_current_timezone()),
                              end_time=datetime(2015, 5, 5, 5, 25, tzinfo=get_current_timezone()))
-        builds += [Build.objects.create(**build_options)]
-        self.assertEqual(project.average_time, timedelta(minutes=15))
+        Build.objects.create(**build_options).record_duration()
+        project = Project.objects.get(pk=project.pk)
+        self.assertEqual(project.average_time, timedelta(minutes=12))
+        self.assertTrue(555 <= project.duration_p50 <= 1355)
+        self.assertGreater(project.duration_p90, project.duration_p50)
+
+    def test_record_duration_of_pull_request(self):
+        project = Project.objects.create(owner='frigg', name='frigg-worker', private=False)
+        build = Build.objects.create(project=project, build_number=1, branch='master',
+                                     pull_request_id=1, start_time=now() - timedelta(minutes=1),
+                                     end_time=now())
+        BranchStatus.objects.create(project=project, branch='master')
+        build.record_duration()
+        self.assertAlmostEqual(project.duration_average, 60, places=0)
+        self.assertIsNone(BranchStatus.objects.get(project=project).duration_average)
+
+        Build.objects.create(project=project, build_number=2).record_duration()
+        self.assertAlmostEqual(project.duration_average, 60, places=0)
 
     def test_number_of_members(self):
         project = Project.objects.create(owner='frigg', name='frigg-worker', private=False)
@@ -117,6 +181,7 @@ class ProjectTestCase(TestCase):
         project = Project.objects.create(owner='frigg', name='frigg-worker', private=False)
         build = Build.objects.create(project=project)
         BuildResult.objects.create(build=build, succeeded=True)
+        BranchStatus.update_from_build(build)
         self.assertIsNotNone(project.get_badge())
         mock_get_badge.assert_called_once_with(True)
 
@@ -131,6 +196,7 @@ class ProjectTestCase(TestCase):
         project = Project.objects.create(owner='frigg', name='frigg-worker', private=False)
         build = Build.objects.create(project=project)
         BuildResult.objects.create(build=build, succeeded=True, coverage=98)
+        BranchStatus.update_from_build(build)
         self.assertIsNotNone(project.get_coverage_badge())
         mock_get_badge.assert_called_once_with(98)
 
@@ -244,8 +310,10 @@ class BuildTestCase(TestCase):
     def test_start(self, mock_set_commit_status):
         build = Build.objects.create(project=self.project, branch='master', build_number=1)
         BuildResult.objects.create(build=build, succeeded=True)
+        version = Project.get_cache_version(self.project.pk)
         build.start()
         self.assertEqual(BuildResult.objects.all().count(), 0)
+        self.assertEqual(Project.get_cache_version(self.project.pk), version + 1)
         self.assertTrue(mock_set_commit_status.called)
 
     @mock.patch('frigg.helpers.github.set_commit_status')
@@ -297,6 +365,10 @@ class BuildTestCase(TestCase):
             self.assertFalse(build.has_timed_out())
             build.start_time = now() - timedelta(seconds=400)
             self.assertTrue(build.has_timed_out())
+        project.duration_p90 = 300
+        self.assertFalse(build.has_timed_out())
+        build.start_time = now() - timedelta(seconds=601)
+        self.assertTrue(build.has_timed_out())
 
     def test_author_user(self):
         user = get_user_model().objects.get(pk=1)
@@ -342,7 +414,9 @@ class BuildTestCase(TestCase):
             project=self.project,
             branch='master',
             build_number=1,
+            start_time=now() - timedelta(minutes=5),
         )
+        version = Project.get_cache_version(self.project.pk)
         build.handle_worker_report({
             'sha': 'superbhash',
             'clone_url': 'https://github.com/frigg/frigg-worker.git',
@@ -359,6 +433,14 @@ class BuildTestCase(TestCase):
         self.assertIsNotNone(Build.objects.get(pk=build.id).end_time)
         mock_set_commit_status.assert_called_once_with(build)
         mock_send_webhook.assert_called_once_with('http://example.com')
+        self.assertGreater(Project.get_cache_version(self.project.pk), version)
+        status = BranchStatus.objects.get(project=self.project, branch='master')
+        self.assertEqual(status.build_id, build.pk)
+        self.assertTrue(status.succeeded)
+        self.assertAlmostEqual(status.duration_average, 300, places=0)
+        self.assertAlmostEqual(Project.objects.get(pk=self.project.pk).duration_average, 300,
+                               places=0)
+        self.assertEqual(build.project.average_time, timedelta(minutes=5))
 
     @mock.patch('frigg.builds.models.Build.send_webhook')
     @mock.patch('frigg.helpers.github.set_commit_status')
@@ -411,6 +493,7 @@ class BuildTestCase(TestCase):
         })
         self.assertIsNone(Build.objects.get(pk=build.id).end_time)
         self.assertEqual(build.result.worker_host, 'albus.frigg.io')
+        self.assertFalse(BranchStatus.objects.exists())
 
     @mock.patch('frigg.builds.models.Project.average_time', timedelta(minutes=10))
     def test_estimated_finish_time(self):
@@ -461,10 +544,100 @@ class BuildTestCase(TestCase):
 
         result = BuildResult.objects.get(pk=result.pk)
         self.assertEqual(result.setup_log, [])
-        self.assertEqual(result.service_tasks, [])
+        self.assertEqual(result.service_log, [])
         self.assertEqual(result.result_log, [])
+        self.assertEqual(result.after_log, [])
+
+    def test_delete_logs_should_archive_logs(self):
+        build = Build.objects.create(project=self.project, branch='master', build_number=4)
+        BuildResult.objects.create(build=build, result_log=[{'task': 'tox', 'log': 'ok'}],
+                                   setup_log=[{'task': 'make'}])
+
+        build.delete_logs()
+        build.delete_logs()
+
+        result = BuildResult.objects.get(build=build)
+        self.assertEqual(result.archive.size, os.path.getsize(get_path(result.archive.digest)))
+        self.assertEqual(result.tasks, [{'task': 'tox', 'log': 'ok'}])
+        self.assertEqual(result.setup_tasks, [{'task': 'make'}])
+        self.assertEqual(result.service_tasks, [])
         self.assertEqual(result.after_tasks, [])
 
+    def test_tasks_without_archive(self):
+        build = Build.objects.create(project=self.project, branch='master', build_number=4)
+        result = BuildResult.objects.create(build=build, result_log=[])
+        with self.assertNumQueries(0):
+            self.assertEqual(result.tasks, [])
+
+    def test_tasks_with_missing_archive_file(self):
+        build = Build.objects.create(project=self.project, branch='master', build_number=4)
+        BuildResult.objects.create(build=build, result_log=[{'task': 'tox', 'log': 'ok'}])
+        build.delete_logs()
+
+        result = BuildResult.objects.get(build=build)
+        self.assertTrue(result.archived)
+        os.remove(get_path(result.archive.digest))
+        self.assertEqual(result.tasks, [])
+
+    def test_archived_summary(self):
+        build = Build.objects.create(project=self.project, branch='master', build_number=4)
+        BuildResult.objects.create(build=build, result_log=[
+            {'task': 'flake8', 'succeeded': True, 'log': 'ok'},
+            {'task': 'tox', 'succeeded': False, 'log': 'failed'},
+        ])
+        build.delete_logs()
+
+        build = Build.objects.select_related('result').get(pk=build.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(build.color, 'red')
+            self.assertEqual(build.first_task_name, 'flake8')
+            self.assertEqual(build.task_count, 2)
+            self.assertEqual(build.failing_tasks, ['tox'])
+
+        build = Build.objects.with_result_summary().get(pk=build.pk)
+        self.assertEqual(build.first_task_name, 'flake8')
+        self.assertEqual(build.task_count, 2)
+        self.assertEqual(build.failing_tasks, ['tox'])
+
+    def test_branch_status_should_not_be_updated_by_older_build(self):
+        older = Build.objects.create(project=self.project, branch='master', build_number=1)
+        newer = Build.objects.create(project=self.project, branch='master', build_number=2)
+        BuildResult.objects.create(build=newer, succeeded=True)
+        BuildResult.objects.create(build=older, succeeded=False)
+        BranchStatus.update_from_build(newer)
+        BranchStatus.update_from_build(older)
+        status = BranchStatus.objects.get(project=self.project, branch='master')
+        self.assertEqual(status.build_id, newer.pk)
+        self.assertTrue(status.succeeded)
+
+    @mock.patch('frigg.builds.models.statsd.incr')
+    def test_create_from_worker_payload_truncates_logs(self, mock_incr):
+        self.project.log_task_limit = 20
+        self.project.log_build_limit = 40
+        build = Build.objects.create(project=self.project, branch='master', build_number=4)
+        result = BuildResult.create_from_worker_payload(build, {
+            'results': [
+                {'task': 'tox', 'log': 'a' * 10 + 'b' * 100 + 'c' * 10},
+                {'task': 'flake8', 'log': 'ok'},
+            ],
+            'setup_results': [{'task': 'make', 'log': 'x' * 15}],
+        })
+
+        tox = result.result_log[0]
+        self.assertTrue(tox['log'].startswith('a' * 10 + '\n\n[... 100 of 120 bytes truncated'))
+        self.assertTrue(tox['log'].endswith('...]\n\n' + 'c' * 10))
+        self.assertEqual(tox['log_size'], 120)
+        self.assertTrue(tox['truncated'])
+        self.assertEqual(result.result_log[1], {'task': 'flake8', 'log': 'ok'})
+        self.assertEqual(result.setup_log, [{'task': 'make', 'log': 'x' * 15}])
+        mock_incr.assert_called_once_with('builds.logs.truncated', 1)
+
+    def test_log_limits(self):
+        self.assertEqual(self.project.log_limits, (settings.FRIGG_LOG_LIMITS['task'],
+                                                   settings.FRIGG_LOG_LIMITS['build']))
+        self.project.log_task_limit = 0
+        self.assertEqual(self.project.log_limits[0], 0)
+
     class BuildResultTestCase(TestCase):
         def setUp(self):
             self.project = Project.objects.create(owner='frigg', name='frigg-worker')
@@ -1,7 +1,9 @@
+import json
+
 from django.core.urlresolvers import reverse
 from django.http import Http404
 
-from frigg.builds.views import download_artifact, last_build
+from frigg.builds.views import download_artifact, export_build_history, last_build
 from frigg.utils.tests import ViewTestCase
 
 
@@ -36,3 +38,27 @@ class BuildsViewTests(ViewTestCase):
             reverse('download_artifact', args=['frigg', 'non-existing', 'htmlcov.zip'])
         )
         self.assertStatusCode(response, 404)
+
+    def test_export_build_history(self):
+        url = reverse('export_build_history', args=['frigg', 'frigg', 'ndjson'])
+        request = self.factory.get(url)
+        self.add_request_fields(request)
+        response = export_build_history(request, 'frigg', 'frigg', 'ndjson')
+        self.assertStatusCode(response, 200)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line)['build_number'] for line in lines], [1, 2, 3])
+
+        request = self.factory.get(url)
+        self.add_request_fields(request, anonymous=True)
+        self.assertRaises(Http404, export_build_history, request, 'frigg', 'frigg', 'ndjson')
+
+    def test_export_build_history_csv(self):
+        response = self.client.get(
+            reverse('export_build_history', args=['chewie', 'frigg', 'csv'])
+        )
+        self.assertStatusCode(response, 200)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[0].startswith('build_number,branch,sha'))
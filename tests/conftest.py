@@ -0,0 +1,16 @@
+import pytest
+from django.core.cache import cache
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """
+    Cached api responses are keyed on versions that fixtures do not bump, so the cache is
+    cleared between tests.
+    """
+    cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def log_archive_directory(settings, tmpdir):
+    settings.FRIGG_LOG_ARCHIVE_DIRECTORY = str(tmpdir.join('log_archive'))
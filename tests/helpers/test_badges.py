@@ -1,6 +1,6 @@
 from django.test import TestCase
 
-from frigg.helpers.badges import _coverage_color
+from frigg.helpers.badges import _coverage_color, _text_width, get_coverage_badge, get_unknown_badge
 
 
 class BadgeHelperTestCase(TestCase):
@@ -11,3 +11,19 @@ class BadgeHelperTestCase(TestCase):
         self.assertEqual(_coverage_color(73), 'yellow')
         self.assertEqual(_coverage_color(55), 'orange')
         self.assertEqual(_coverage_color(42), 'red')
+
+    def test_text_width(self):
+        self.assertEqual(_text_width('build'), 27)
+        self.assertEqual(_text_width('100%'), 33)
+
+    def test_get_coverage_badge(self):
+        badge = get_coverage_badge(92.5)
+        self.assertIn('>coverage</text>', badge)
+        self.assertIn('>92.5%</text>', badge)
+        self.assertIn('fill="#97CA00"', badge)
+        self.assertIs(badge, get_coverage_badge(92.5))
+
+    def test_get_unknown_badge(self):
+        badge = get_unknown_badge('build')
+        self.assertIn('>build</text>', badge)
+        self.assertIn('>unknown</text>', badge)
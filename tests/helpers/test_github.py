@@ -1,10 +1,22 @@
+import json
+from unittest import mock
+
+import responses
+from django.conf import settings
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from mockredis import mock_redis_client
 
 from frigg.builds.models import Build, BuildResult, Project
-from frigg.helpers.github import _get_status_from_build, get_pull_request_url
+from frigg.helpers.github import (_get_status_from_build, flush_commit_statuses,
+                                  get_pull_request_url, set_commit_status, update_repo_permissions)
+
+STATUS_URL = 'https://api.github.com/repos/frigg/frigg/statuses/sha'
+STATUS_KEY = 'repos/frigg/frigg/statuses/sha:continuous-integration/frigg'
 
 
 class GithubHelpersTestCase(TestCase):
+    fixtures = ['frigg/builds/fixtures/users.json']
 
     def test__get_status_from_build(self):
         error = RuntimeError()
@@ -29,3 +41,105 @@ class GithubHelpersTestCase(TestCase):
         build = Build(project=project, branch='master', pull_request_id=1)
         self.assertEqual(get_pull_request_url(build),
                          'https://github.com/frigg/frigg-worker/pull/1')
+
+    @mock.patch('frigg.helpers.github.list_organization', lambda user: [])
+    @mock.patch('frigg.helpers.github.list_user_repos')
+    def test_update_repo_permissions(self, mock_list_user_repos):
+        user = get_user_model().objects.get(pk=1)
+        frigg = Project.objects.create(owner='frigg', name='frigg')
+        worker = Project.objects.create(owner='frigg', name='frigg-worker')
+        crossed = Project.objects.create(owner='tind', name='frigg')
+        stale = Project.objects.create(owner='tind', name='stale')
+        frigg.members.add(user)
+        stale.members.add(user)
+        mock_list_user_repos.return_value = [
+            {'owner': {'login': 'frigg'}, 'name': 'frigg'},
+            {'owner': {'login': 'frigg'}, 'name': 'frigg-worker'},
+            {'owner': {'login': 'tind'}, 'name': 'unknown'},
+        ]
+
+        # The insert runs in a savepoint, which adds two queries in tests.
+        with self.assertNumQueries(5):
+            update_repo_permissions(user)
+        self.assertEqual(set(user.projects.all()), {frigg, worker, stale})
+        self.assertNotIn(crossed, user.projects.all())
+
+        update_repo_permissions(user, remove_stale=True)
+        self.assertEqual(set(user.projects.all()), {frigg, worker})
+
+
+@mock.patch('redis.Redis', mock_redis_client)
+class CommitStatusTestCase(TestCase):
+
+    def setUp(self):
+        mock_redis_client().flushall()
+        project = Project.objects.create(owner='frigg', name='frigg')
+        self.build = Build.objects.create(project=project, build_number=1, sha='sha')
+
+    @responses.activate
+    def test_set_commit_status_should_skip_identical_statuses(self):
+        responses.add(responses.POST, STATUS_URL, status=201, body='{}')
+        BuildResult.objects.create(build=self.build, succeeded=True)
+        self.assertIsNotNone(set_commit_status(self.build))
+        self.assertIsNone(set_commit_status(self.build))
+        self.assertEqual(len(responses.calls), 1)
+
+    @responses.activate
+    def test_set_commit_status_should_coalesce_pending_statuses(self):
+        responses.add(responses.POST, STATUS_URL, status=201, body='{}')
+        set_commit_status(self.build, pending=True)
+        set_commit_status(self.build, error='Something')
+        set_commit_status(self.build, pending=True)
+        self.assertEqual(len(responses.calls), 2)
+        self.assertIn('"state": "error"', responses.calls[1].request.body)
+
+    @responses.activate
+    def test_set_commit_status_should_retry_failed_statuses(self):
+        responses.add(responses.POST, STATUS_URL, status=502, body='{}')
+        BuildResult.objects.create(build=self.build, succeeded=True)
+        set_commit_status(self.build)
+        flush_commit_statuses()
+        self.assertEqual(len(responses.calls), 2)
+
+    @responses.activate
+    @mock.patch('frigg.builds.models.Project.github_token', 'token')
+    def test_set_commit_status_should_not_store_token_in_outbox(self):
+        responses.add(responses.POST, STATUS_URL, status=502, body='{}')
+        set_commit_status(self.build, pending=True)
+        outbox = mock_redis_client().hvals(settings.FRIGG_COMMIT_STATUS_OUTBOX)
+        self.assertEqual(len(outbox), 1)
+        self.assertNotIn(b'token', outbox[0])
+        self.assertIn('access_token=token', responses.calls[0].request.url)
+
+    @responses.activate
+    def test_flush_should_not_post_status_older_than_last_posted(self):
+        responses.add(responses.POST, STATUS_URL, status=201, body='{}')
+        set_commit_status(self.build, pending=True)
+        BuildResult.objects.create(build=self.build, succeeded=True)
+        set_commit_status(self.build)
+        self.assertEqual(len(responses.calls), 2)
+
+        r = mock_redis_client()
+        r.hset(settings.FRIGG_COMMIT_STATUS_OUTBOX, STATUS_KEY, json.dumps({
+            'url': 'repos/frigg/frigg/statuses/sha',
+            'project': self.build.project_id,
+            'data': {'state': 'pending', 'context': 'continuous-integration/frigg'},
+            'sequence': 1,
+        }))
+        r.delete('frigg:statuses:window:{0}'.format(STATUS_KEY))
+        flush_commit_statuses()
+        self.assertEqual(len(responses.calls), 2)
+        self.assertFalse(r.hexists(settings.FRIGG_COMMIT_STATUS_OUTBOX, STATUS_KEY))
+
+    @responses.activate
+    def test_set_commit_status_should_wait_for_lock(self):
+        responses.add(responses.POST, STATUS_URL, status=201, body='{}')
+        r = mock_redis_client()
+        r.set('frigg:statuses:lock:{0}'.format(STATUS_KEY), 1)
+        self.assertIsNone(set_commit_status(self.build, pending=True))
+        self.assertEqual(len(responses.calls), 0)
+        self.assertTrue(r.hexists(settings.FRIGG_COMMIT_STATUS_OUTBOX, STATUS_KEY))
+
+        r.delete('frigg:statuses:lock:{0}'.format(STATUS_KEY))
+        flush_commit_statuses()
+        self.assertEqual(len(responses.calls), 1)
@@ -0,0 +1,86 @@
+from unittest import mock
+
+import redis
+import requests
+import responses
+from django.test import TestCase, override_settings
+from mockredis import mock_redis_client
+
+from frigg.helpers import http
+
+
+@mock.patch('redis.Redis', mock_redis_client)
+@override_settings(FRIGG_CIRCUIT_BREAKER={'failure_threshold': 2, 'reset_timeout': 30})
+class CircuitBreakerTestCase(TestCase):
+
+    def setUp(self):
+        mock_redis_client().flushall()
+
+    def test_get_timeout(self):
+        self.assertEqual(http.get_timeout('api.github.com'), 10)
+        self.assertEqual(http.get_timeout('example.com'), 5)
+
+    @responses.activate
+    def test_request_should_open_circuit_after_failures(self):
+        responses.add(responses.GET, 'https://example.com/', status=503)
+        http.get('https://example.com/')
+        self.assertEqual(http.CircuitBreaker('example.com').state, http.CLOSED)
+        http.get('https://example.com/')
+        self.assertEqual(http.CircuitBreaker('example.com').state, http.OPEN)
+        self.assertRaises(http.CircuitOpenError, http.get, 'https://example.com/')
+        self.assertEqual(len(responses.calls), 2)
+
+    @responses.activate
+    def test_request_should_count_connection_errors(self):
+        responses.add(responses.GET, 'https://example.com/',
+                      body=requests.ConnectionError('Connection refused'))
+        self.assertRaises(requests.ConnectionError, http.get, 'https://example.com/')
+        self.assertEqual(http.CircuitBreaker('example.com').failures, 1)
+
+    @responses.activate
+    def test_half_open_circuit_should_close_after_successful_trial(self):
+        responses.add(responses.GET, 'https://example.com/', status=200)
+        breaker = http.CircuitBreaker('example.com')
+        breaker.record_failure()
+        breaker.record_failure()
+        breaker.redis.delete(breaker._key('open'))
+        self.assertEqual(breaker.state, http.HALF_OPEN)
+        http.get('https://example.com/')
+        self.assertEqual(breaker.state, http.CLOSED)
+
+    def test_half_open_circuit_should_allow_one_trial(self):
+        breaker = http.CircuitBreaker('example.com')
+        breaker.record_failure()
+        breaker.record_failure()
+        breaker.redis.delete(breaker._key('open'))
+        self.assertTrue(breaker.allow_request())
+        self.assertFalse(breaker.allow_request())
+
+
+class FailingRedis(object):
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __getattr__(self, name):
+        def method(*args, **kwargs):
+            raise redis.ConnectionError('Connection refused')
+        return method
+
+
+@mock.patch('redis.Redis', FailingRedis)
+class CircuitBreakerRedisErrorTestCase(TestCase):
+
+    @responses.activate
+    def test_request_should_return_response(self):
+        responses.add(responses.GET, 'https://example.com/', status=200)
+        self.assertEqual(http.get('https://example.com/').status_code, 200)
+        responses.reset()
+        responses.add(responses.GET, 'https://example.com/', status=503)
+        self.assertEqual(http.get('https://example.com/').status_code, 503)
+
+    @responses.activate
+    def test_request_should_raise_original_exception(self):
+        responses.add(responses.GET, 'https://example.com/',
+                      body=requests.ConnectionError('Connection refused'))
+        self.assertRaises(requests.ConnectionError, http.get, 'https://example.com/')
@@ -0,0 +1,57 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.urlresolvers import reverse
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils.timezone import now
+
+from frigg.builds.models import Build, BuildResult, Project
+
+
+class AdminChangelistTestCase(TestCase):
+    fixtures = ['frigg/builds/fixtures/users.json']
+
+    def setUp(self):
+        self.user = get_user_model().objects.get(pk=1)
+        self.client.force_login(self.user)
+
+    def create_project(self, name):
+        project = Project.objects.create(owner='frigg', name=name)
+        project.members.add(self.user)
+        for build_number in range(1, 4):
+            build = Build.objects.create(project=project, build_number=build_number,
+                                         start_time=now() - timedelta(minutes=2),
+                                         end_time=now())
+            BuildResult.objects.create(build=build, succeeded=True)
+            build.record_duration()
+        return project
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context)
+
+    def test_project_changelist_query_count(self):
+        url = reverse('admin:builds_project_changelist')
+        self.create_project('frigg')
+        queries = self.count_queries(url)
+        for index in range(5):
+            self.create_project('frigg-{0}'.format(index))
+        self.assertEqual(self.count_queries(url), queries)
+
+        response = self.client.get(url)
+        project = response.context['cl'].result_list[0]
+        self.assertEqual(project.members_count, 1)
+        self.assertEqual(project.max_build_number, 3)
+        self.assertEqual(project.average_time, timedelta(minutes=2))
+
+    def test_build_changelist_query_count(self):
+        url = reverse('admin:builds_build_changelist')
+        self.create_project('frigg')
+        queries = self.count_queries(url)
+        for index in range(5):
+            self.create_project('frigg-{0}'.format(index))
+        self.assertEqual(self.count_queries(url), queries)
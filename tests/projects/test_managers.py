@@ -1,8 +1,11 @@
 # -*- coding: utf8 -*-
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import AnonymousUser
-from django.test import TestCase
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
 
+from frigg.builds.models import Build, BuildResult
 from frigg.projects.models import Project
 
 
@@ -12,12 +15,53 @@ class ProjectManagerTests(TestCase):
 
     def setUp(self):
         self.user = get_user_model().objects.get(pk=1)
+        cache.clear()
 
     def tearDown(self):
         get_user_model().objects.all().delete()
         Project.objects.all().delete()
 
+    def explain(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN ' + sql, params)
+            return '\n'.join(row[0] for row in cursor.fetchall())
+
     def test_project_permitted_objects(self):
         self.assertEqual(Project.objects.all().count(), 4)
         self.assertEqual(Project.objects.permitted(self.user).count(), 3)
         self.assertEqual(Project.objects.permitted(AnonymousUser()).count(), 2)
+
+    def test_permitted_queries_are_not_distinct(self):
+        for model in [Project, Build, BuildResult]:
+            for user in [self.user, AnonymousUser()]:
+                queryset = model.objects.permitted(user)
+                self.assertNotIn('DISTINCT', str(queryset.query))
+                plan = self.explain(queryset)
+                self.assertNotIn('Unique', plan)
+                self.assertNotIn('HashAggregate', plan)
+
+    def test_member_projects(self):
+        self.assertEqual(Project.objects.member_projects(self.user), [1, 4])
+        with self.assertNumQueries(0):
+            self.assertEqual(Project.objects.member_projects(self.user), [1, 4])
+
+    def test_member_projects_invalidated_by_membership_changes(self):
+        Project.objects.member_projects(self.user)
+        Project.objects.get(pk=2).members.add(self.user)
+        self.assertEqual(Project.objects.member_projects(self.user), [1, 2, 4])
+
+        self.user.projects.remove(1)
+        self.assertEqual(Project.objects.member_projects(self.user), [2, 4])
+
+        Project.objects.get(pk=2).members.clear()
+        self.assertEqual(Project.objects.member_projects(self.user), [4])
+        self.assertEqual(Project.objects.permitted(self.user).count(), 2)
+
+    @override_settings(FRIGG_PERMITTED_IDS_INLINE_LIMIT=1)
+    def test_member_projects_subquery(self):
+        queryset = Project.objects.permitted(self.user)
+        self.assertIn('builds_project_members', str(queryset.query))
+        self.assertNotIn('DISTINCT', str(queryset.query))
+        self.assertEqual(queryset.count(), 3)
+        self.assertEqual(Build.objects.permitted(self.user).count(), 4)
@@ -1,10 +1,8 @@
-from unittest import skip
-
 from django.contrib.staticfiles import finders
 from django.core.urlresolvers import reverse
 from django.test import TestCase
 
-from frigg.builds.models import BuildResult
+from frigg.builds.models import BranchStatus
 
 
 class BuildBadgeViewTests(TestCase):
@@ -30,7 +28,7 @@ class BuildBadgeViewTests(TestCase):
         self.assertEquals(response.content, self.success)
 
     def test_failure(self):
-        BuildResult.objects.all().update(succeeded=False)
+        BranchStatus.objects.all().update(succeeded=False)
         response = self.client.get(reverse('build_badge', args=['frigg', 'frigg']))
         self.assertStatusCode(response)
         self.assertEquals(response.content, self.failure)
@@ -44,8 +42,24 @@ class BuildBadgeViewTests(TestCase):
         response = self.client.get(reverse('build_badge', args=['frigg', 'nothing']))
         self.assertStatusCode(response, code=404)
 
+    def test_etag(self):
+        response = self.client.get(reverse('build_badge', args=['frigg', 'frigg']))
+        self.assertIn('max-age=60', response['Cache-Control'])
+        etag = response['ETag']
+
+        response = self.client.get(reverse('build_badge', args=['frigg', 'frigg']),
+                                   HTTP_IF_NONE_MATCH=etag)
+        self.assertStatusCode(response, code=304)
+        self.assertEqual(response['ETag'], etag)
+
+        BranchStatus.objects.all().update(succeeded=False)
+        response = self.client.get(reverse('build_badge', args=['frigg', 'frigg']),
+                                   HTTP_IF_NONE_MATCH=etag)
+        self.assertStatusCode(response)
+        self.assertEquals(response.content, self.failure)
+        self.assertNotEqual(response['ETag'], etag)
+
 
-@skip("service is down")
 class CoverageBadgeViewTests(TestCase):
     fixtures = ['frigg/builds/fixtures/users.json', 'frigg/builds/fixtures/test_views.yaml']
 
@@ -53,7 +67,7 @@ class CoverageBadgeViewTests(TestCase):
         self.assertEqual(response.status_code, code)
 
     def test_coverage(self):
-        BuildResult.objects.all().update(coverage=92.5)
+        BranchStatus.objects.all().update(coverage=92.5)
         response = self.client.get(reverse('coverage_badge', args=['frigg', 'frigg']))
         self.assertStatusCode(response)
         self.assertIsNotNone(response.content)
@@ -0,0 +1,31 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils.timezone import now
+
+from frigg.builds.models import Build, BuildResult, Project
+from frigg.stats.models import DailyBuildStats
+
+
+@pytest.mark.django_db
+def test_update_daily_build_stats():
+    project = Project.objects.create(owner='frigg', name='frigg')
+    build = Build.objects.create(project=project, build_number=1, start_time=now(),
+                                 end_time=now())
+    BuildResult.objects.create(build=build, succeeded=False, coverage=80)
+    Build.objects.create(project=project, build_number=2, start_time=now())
+    Build.objects.create(project=project, build_number=3)
+    restarted = Build.objects.create(project=project, build_number=4,
+                                     start_time=now() + timedelta(days=2))
+    Build.objects.filter(pk=restarted.pk).update(created_at=now() - timedelta(days=5))
+    DailyBuildStats.objects.create(project=project, date=now().date(), started=42)
+
+    call_command('update_daily_build_stats', days=1)
+
+    stats = DailyBuildStats.objects.get(project=project)
+    assert stats.started == 2
+    assert stats.succeeded == 0
+    assert stats.failed == 1
+    assert stats.coverage_sum == 80
+    assert stats.coverage_count == 1
@@ -0,0 +1,38 @@
+# -*- coding: utf8 -*-
+from unittest import mock
+
+from django.test import TestCase
+from mockredis import mock_redis_client
+
+from frigg.builds.models import Build, BuildResult, Project
+from frigg.stats import counters
+
+
+@mock.patch('redis.Redis', mock_redis_client)
+class CountersTestCase(TestCase):
+
+    def setUp(self):
+        mock_redis_client().flushall()
+        project = Project.objects.create(owner='frigg', name='frigg')
+        self.build = Build.objects.create(project=project, build_number=1)
+
+    def test_get_live_stats(self):
+        counters.build_started(self.build)
+        counters.webhook_received()
+        counters.webhook_received()
+        result = BuildResult(build=self.build, still_running=True, worker_host='albus')
+        counters.build_reported(self.build, result)
+
+        stats = counters.get_live_stats(minutes=5)
+        self.assertEqual(len(stats['per_minute']), 5)
+        self.assertEqual(stats['per_minute'][-1]['builds_started'], 1)
+        self.assertEqual(stats['per_minute'][-1]['builds_finished'], 0)
+        self.assertEqual(stats['per_minute'][-1]['webhooks'], 2)
+        self.assertEqual(stats['running'], {'albus': 1})
+        self.assertIn(self.build.project.queue_name, stats['queues'])
+
+        result.still_running = False
+        counters.build_reported(self.build, result)
+        stats = counters.get_live_stats(minutes=5)
+        self.assertEqual(stats['per_minute'][-1]['builds_finished'], 1)
+        self.assertEqual(stats['running'], {})
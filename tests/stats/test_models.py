@@ -0,0 +1,44 @@
+# -*- coding: utf8 -*-
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils.timezone import now
+
+from frigg.builds.models import Build, BuildResult, Project
+from frigg.stats.models import DailyBuildStats
+
+
+class DailyBuildStatsTestCase(TestCase):
+
+    def setUp(self):
+        self.project = Project.objects.create(owner='frigg', name='frigg')
+        self.build = Build.objects.create(project=self.project, build_number=1,
+                                          start_time=now() - timedelta(minutes=2), end_time=now())
+
+    def test_increment(self):
+        DailyBuildStats.increment(self.project.pk, now().date(), started=1)
+        DailyBuildStats.increment(self.project.pk, now().date(), started=1, failed=1)
+        stats = DailyBuildStats.objects.get(project=self.project)
+        self.assertEqual(stats.started, 2)
+        self.assertEqual(stats.failed, 1)
+
+    def test_record_started(self):
+        DailyBuildStats.record_started(self.build)
+        self.assertEqual(DailyBuildStats.objects.get(project=self.project).started, 1)
+
+    def test_record_finished(self):
+        BuildResult.objects.create(build=self.build, succeeded=True, coverage=Decimal('90.5'))
+        DailyBuildStats.record_finished(self.build)
+        stats = DailyBuildStats.objects.get(project=self.project)
+        self.assertEqual(stats.succeeded, 1)
+        self.assertEqual(stats.failed, 0)
+        self.assertEqual(stats.total_duration, 120)
+        self.assertEqual(stats.coverage_sum, Decimal('90.5'))
+        self.assertEqual(stats.coverage_count, 1)
+
+        DailyBuildStats.record_finished(self.build, sign=-1)
+        stats = DailyBuildStats.objects.get(project=self.project)
+        self.assertEqual(stats.succeeded, 0)
+        self.assertEqual(stats.total_duration, 0)
+        self.assertEqual(stats.coverage_count, 0)
@@ -1,7 +1,11 @@
 # -*- coding: utf8 -*-
+import json
+from unittest import mock
+
 from django.core.urlresolvers import reverse
+from mockredis import mock_redis_client
 
-from frigg.stats.views import overview
+from frigg.stats.views import live_data, overview
 from frigg.utils.tests import ViewTestCase
 
 
@@ -24,3 +28,17 @@ class StatsSmokeViewTestCase(ViewTestCase):
         self.add_request_fields(request, staff=True)
         response = overview(request)
         self.assertStatusCode(response, 200)
+
+    @mock.patch('redis.Redis', mock_redis_client)
+    def test_live_data_staff_user(self):
+        request = self.factory.get(reverse('stats:live_data'))
+        self.add_request_fields(request, staff=True)
+        response = live_data(request)
+        self.assertStatusCode(response, 200)
+        self.assertIn('per_minute', json.loads(response.content.decode()))
+
+    def test_live_data_regular_user(self):
+        request = self.factory.get(reverse('stats:live_data'))
+        self.add_request_fields(request)
+        response = live_data(request)
+        self.assertStatusCode(response, 302)